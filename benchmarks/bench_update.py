@@ -0,0 +1,243 @@
+"""KEPCO 전기요금 센서 업데이트 경로 벤치마크
+
+한전 요금계산기(`/pr/calcul/calcul`)를 흉내 내는 로컬 aiohttp 서버를 띄우고,
+가상의 사용량 스트림으로 N개의 `KepcoElectricitySensor`를 갱신하면서
+업데이트 지연 백분위, 시간당 외부 호출 수, 이벤트 루프 블로킹 시간, 엔티티당 메모리를 측정합니다.
+
+Home Assistant가 설치된 개발 환경에서 저장소 루트 기준으로 실행합니다.
+
+    python benchmarks/bench_update.py --entities 200 --hours 72 --mode remote --latency 0.3 --error-rate 0.05 --allow-failures
+
+계산 실패가 한 번이라도 있으면 (오류가 로그로만 남아 측정값이 의미 없으므로) 0이 아닌 코드로 종료합니다.
+대역 서버 오류를 주입해 실패가 예상되는 경우에만 --allow-failures 를 붙입니다.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "custom_components"))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers.debounce import Debouncer  # noqa: E402
+
+import kepco_electricity as integration  # noqa: E402
+from kepco_electricity import api as api_module  # noqa: E402
+from kepco_electricity.const import DATA_METRICS, DOMAIN  # noqa: E402
+from kepco_electricity.metrics import FAILED  # noqa: E402
+from kepco_electricity.sensor import KepcoElectricitySensor  # noqa: E402
+from kepco_electricity.tariff import calculate_bill  # noqa: E402
+
+_LOGGER = logging.getLogger("bench")
+
+CALC_PATH = "/pr/calcul/calcul"
+
+
+class FakeKepcoServer:
+    """지연/오류율을 설정할 수 있는 한전 요금계산기 대역 서버"""
+
+    def __init__(self, latency: float, error_rate: float):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self._runner = None
+        self.url = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        payload = await request.json()
+        if self.latency:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency)
+        if random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text="Service Unavailable")
+        response = web.json_response({"dma_resObj": calculate_bill(payload["dma_reqParam"])})
+        self.bytes_sent += len(response.body)
+        return response
+
+    async def async_start(self) -> None:
+        app = web.Application()
+        app.router.add_post(CALC_PATH, self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}{CALC_PATH}"
+
+    async def async_stop(self) -> None:
+        await self._runner.cleanup()
+
+
+class LoopLagMonitor:
+    """이벤트 루프가 막힌 시간 측정 (예정보다 늦게 깨어난 시간의 합)"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.blocked = 0.0
+        self.worst = 0.0
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - start - self.interval
+            if lag > 0:
+                self.blocked += lag
+                self.worst = max(self.worst, lag)
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def make_sensor(hass: HomeAssistant, index: int, options: dict) -> KepcoElectricitySensor:
+    entry = SimpleNamespace(
+        entry_id=f"bench_{index}",
+        options={**options, "usage_entity": f"sensor.bench_usage_{index}", "sensor_name": f"Bench {index}"},
+    )
+    sensor = KepcoElectricitySensor(entry)
+    sensor.hass = hass
+    sensor.entity_id = f"sensor.bench_bill_{index}"
+    # 상태 기록 비용은 제외하고 업데이트 경로만 측정
+    sensor.async_write_ha_state = lambda: None
+    sensor._async_start_calendar()
+    sensor._debouncer = Debouncer(hass, _LOGGER, cooldown=0, immediate=True, function=sensor._async_refresh)
+    hass.data[DOMAIN]["coordinator"].entities[entry.entry_id] = sensor
+    return sensor
+
+
+async def async_run(args: argparse.Namespace) -> dict:
+    server = FakeKepcoServer(args.latency, args.error_rate)
+    await server.async_start()
+    api_module.API_URL = server.url
+
+    config_dir = tempfile.mkdtemp(prefix="kepco_bench_")
+    hass = HomeAssistant(config_dir)
+    await integration.async_setup(
+        hass, {DOMAIN: {"requests_per_second": args.rps, "max_parallel_requests": args.parallel}}
+    )
+
+    options = {
+        "meter_reading_day": 25,
+        "meter_reading_day_offset": 0,
+        "lhv_clcd": "1",
+        "dwel_clcd": "1",
+        "wlfr_dc_clcd1": "",
+        "wlfr_dc_clcd2": "",
+        "calculation_mode": args.mode,
+        "api_check_interval": args.check_interval,
+    }
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    sensors = [make_sensor(hass, index, options) for index in range(args.entities)]
+    usages = [random.uniform(0, 50) for _ in sensors]
+    for index, usage in enumerate(usages):
+        hass.states.async_set(f"sensor.bench_usage_{index}", f"{usage:.3f}")
+    await asyncio.gather(*(sensor.async_update() for sensor in sensors))
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies: list[float] = []
+    monitor = LoopLagMonitor()
+    monitor.start()
+    requests_before = server.requests
+    started = time.perf_counter()
+
+    async def _async_tick(index: int, sensor: KepcoElectricitySensor) -> None:
+        start = time.perf_counter()
+        await sensor._async_refresh()
+        latencies.append(time.perf_counter() - start)
+
+    # 한 틱 = 사용량 센서 1회 보고 (기본 1분 간격), 계량기별 평균 0.5kWh/h
+    ticks = int(args.hours * 60 / args.report_minutes)
+    for _ in range(ticks):
+        for index in range(len(usages)):
+            usages[index] += random.expovariate(1) * 0.5 * args.report_minutes / 60
+            hass.states.async_set(f"sensor.bench_usage_{index}", f"{usages[index]:.3f}")
+        await asyncio.gather(*(_async_tick(index, sensor) for index, sensor in enumerate(sensors)))
+
+    elapsed = time.perf_counter() - started
+    failed = hass.data[DOMAIN][DATA_METRICS].get(FAILED)
+    await monitor.stop()
+    for sensor in sensors:
+        sensor._calendar.async_stop()
+    await hass.data[DOMAIN]["coordinator"].async_shutdown()
+    await server.async_stop()
+    await hass.async_stop(force=True)
+
+    outbound = server.requests - requests_before
+    return {
+        "entities": args.entities,
+        "mode": args.mode,
+        "simulated_hours": args.hours,
+        "updates": len(latencies),
+        "failed": failed,
+        "wall_seconds": round(elapsed, 3),
+        "latency_p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "latency_p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "latency_p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "latency_mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "outbound_calls_per_hour": round(outbound / args.hours, 2),
+        "upstream_errors": server.errors,
+        "bytes_per_call": round(server.bytes_sent / max(1, server.requests - server.errors)),
+        "loop_blocked_ms": round(monitor.blocked * 1000, 3),
+        "loop_worst_block_ms": round(monitor.worst * 1000, 3),
+        "memory_per_entity_kib": round((after - before) / args.entities / 1024, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entities", type=int, default=50, help="시뮬레이션할 요금 센서 수")
+    parser.add_argument("--hours", type=float, default=24, help="시뮬레이션할 시간 (시간)")
+    parser.add_argument("--report-minutes", type=float, default=1, help="사용량 센서 보고 간격 (분)")
+    parser.add_argument("--mode", choices=("local", "remote"), default="local", help="요금 계산 방식")
+    parser.add_argument("--check-interval", type=int, default=0, help="로컬 계산 검증 주기 (시간)")
+    parser.add_argument("--latency", type=float, default=0.2, help="대역 서버 평균 응답 지연 (초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="대역 서버 오류 응답 비율 (0~1)")
+    parser.add_argument("--rps", type=float, default=20, help="초당 한전 API 요청 수 제한")
+    parser.add_argument("--parallel", type=int, default=4, help="동시 한전 API 요청 수")
+    parser.add_argument("--allow-failures", action="store_true", help="계산 실패가 있어도 정상 종료")
+    parser.add_argument("--seed", type=int, default=0, help="난수 시드")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    logging.basicConfig(level=logging.WARNING)
+    result = asyncio.run(async_run(args))
+    width = max(map(len, result))
+    for key, value in result.items():
+        print(f"{key:<{width}}  {value}")
+    if result["failed"] and not args.allow_failures:
+        sys.exit(f"요금 계산 실패 {result['failed']}회 (로그 확인)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,182 @@
 """KEPCO 전기요금 계산 통합구성요소"""
 from __future__ import annotations
 
+import asyncio
 import logging
+
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
-from .const import DOMAIN
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from .const import (
+    DOMAIN,
+    DATA_API,
+    DATA_CACHE,
+    DATA_COORDINATOR,
+    DATA_METRICS,
+    DATA_BACKFILL,
+    DATA_REPLAY,
+    DATA_TABLE_BUILDS,
+    CONF_REQUESTS_PER_SECOND,
+    CONF_MAX_PARALLEL_REQUESTS,
+    DEFAULT_REQUESTS_PER_SECOND,
+    DEFAULT_MAX_PARALLEL_REQUESTS,
+    SERVICE_REFRESH_ALL,
+    SERVICE_BACKFILL_STATISTICS,
+    SERVICE_COMPARE_TARIFFS,
+)
+from .api import KepcoApiClient
+from .cache import KepcoResponseCache
+from .coordinator import KepcoCalculationCoordinator
+from .metrics import KepcoMetrics
+from .replay import KepcoReplay
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = vol.Schema(
+    {
+        vol.Optional(DOMAIN): vol.Schema(
+            {
+                vol.Optional(CONF_REQUESTS_PER_SECOND, default=DEFAULT_REQUESTS_PER_SECOND): vol.All(
+                    vol.Coerce(float), vol.Range(min=0.1, max=20)
+                ),
+                vol.Optional(CONF_MAX_PARALLEL_REQUESTS, default=DEFAULT_MAX_PARALLEL_REQUESTS): vol.All(
+                    cv.positive_int, vol.Range(min=1, max=16)
+                ),
+            }
+        )
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
 async def async_setup(hass: HomeAssistant, config: dict):
     """통합구성요소 초기 설정"""
     hass.data.setdefault(DOMAIN, {})
+    conf = config.get(DOMAIN, {})
+
+    # 모든 Config Entry가 함께 쓰는 요금 계산 캐시
+    cache = KepcoResponseCache(hass)
+    await cache.async_load()
+    hass.data[DOMAIN][DATA_CACHE] = cache
+    metrics = KepcoMetrics()
+    hass.data[DOMAIN][DATA_METRICS] = metrics
+    hass.data[DOMAIN][DATA_TABLE_BUILDS] = {}  # (요금 조건, 최대 사용량) → 생성 중인 요금표
+    max_parallel = conf.get(CONF_MAX_PARALLEL_REQUESTS, DEFAULT_MAX_PARALLEL_REQUESTS)
+    api = KepcoApiClient(hass, metrics, max_parallel)
+    hass.data[DOMAIN][DATA_API] = api
+    coordinator = KepcoCalculationCoordinator(
+        hass,
+        api,
+        cache,
+        metrics,
+        conf.get(CONF_REQUESTS_PER_SECOND, DEFAULT_REQUESTS_PER_SECOND),
+        max_parallel,
+    )
+    hass.data[DOMAIN][DATA_COORDINATOR] = coordinator
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, coordinator.async_shutdown)
+    # 오프라인 우선 계산 방식용 한전 응답 기록
+    replay = KepcoReplay(hass, cache)
+    hass.data[DOMAIN][DATA_REPLAY] = replay
+    await replay.async_load()
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, replay.async_shutdown)
+
+    async def async_refresh_all(call: ServiceCall) -> ServiceResponse:
+        """모든 요금 센서를 다시 계산하고 진행 상황 보고"""
+        sensors = list(coordinator.entities.values())
+        total = len(sensors)
+        step = max(1, total // 10)
+        completed = 0
+        failed = 0
+
+        async def _async_refresh(sensor) -> None:
+            nonlocal completed, failed
+            if not await sensor.async_force_refresh():
+                failed += 1
+            completed += 1
+            if completed % step == 0 or completed == total:
+                _LOGGER.info("요금 일괄 갱신 진행: %s/%s (대기 중인 API 요청 %s건)", completed, total, coordinator.pending)
+
+        await asyncio.gather(*(_async_refresh(sensor) for sensor in sensors))
+        return {"total": total, "succeeded": total - failed, "failed": failed}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REFRESH_ALL,
+        async_refresh_all,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_backfill_statistics(call: ServiceCall) -> ServiceResponse:
+        """지난 검침 기간 요금을 장기 통계로 가져오기"""
+        if "recorder" not in hass.config.components:
+            raise HomeAssistantError("지난 요금 가져오기에는 레코더가 필요합니다")
+        from .backfill import KepcoBackfill
+
+        if DATA_BACKFILL not in hass.data[DOMAIN]:
+            hass.data[DOMAIN][DATA_BACKFILL] = KepcoBackfill(hass)
+        backfill = hass.data[DOMAIN][DATA_BACKFILL]
+        entry_id = call.data.get("config_entry_id")
+        entries = [
+            entry for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry_id is None or entry.entry_id == entry_id
+        ]
+        if not entries:
+            raise HomeAssistantError(f"설정 항목을 찾을 수 없습니다: {entry_id}")
+        results = await asyncio.gather(*(backfill.async_run(entry, call.data["periods"]) for entry in entries))
+        return {entry.entry_id: result for entry, result in zip(entries, results)}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BACKFILL_STATISTICS,
+        async_backfill_statistics,
+        schema=vol.Schema({
+            vol.Optional("config_entry_id"): cv.string,
+            vol.Optional("periods", default=12): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+        }),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def async_compare_tariffs(call: ServiceCall) -> ServiceResponse:
+        """여러 요금 조건의 이번 달 요금 비교"""
+        from .scenarios import async_compare_scenarios
+
+        entry_id = call.data.get("config_entry_id")
+        entries = [
+            entry for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry_id is None or entry.entry_id == entry_id
+        ]
+        if len(entries) != 1:
+            raise HomeAssistantError(
+                f"설정 항목을 찾을 수 없습니다: {entry_id}" if entry_id or not entries
+                else "설정 항목이 여러 개이면 config_entry_id 를 지정해야 합니다"
+            )
+        return await async_compare_scenarios(hass, entries[0], call.data["scenarios"])
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_COMPARE_TARIFFS,
+        async_compare_tariffs,
+        schema=vol.Schema({
+            vol.Optional("config_entry_id"): cv.string,
+            vol.Required("scenarios"): vol.All(
+                cv.ensure_list,
+                [vol.Schema({
+                    vol.Optional("name", default=""): cv.string,
+                    vol.Exclusive("usage", "usage"): vol.All(vol.Coerce(int), vol.Range(min=0)),
+                    vol.Exclusive("usage_delta", "usage"): vol.Coerce(int),
+                    vol.Optional("lhv_clcd"): vol.In(["1", "2"]),
+                    vol.Optional("dwel_clcd"): vol.In(["1", "2"]),
+                    vol.Optional("wlfr_dc_clcd1"): vol.In(["none", "01", "02", "03", "04", "05", "07", "09"]),
+                    vol.Optional("wlfr_dc_clcd2"): vol.In(["none", "21", "22", "23", "24"]),
+                })],
+                vol.Length(min=1, max=50),
+            ),
+        }),
+        supports_response=SupportsResponse.ONLY,
+    )
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -31,7 +197,16 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN].pop(entry.entry_id)
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Config Entry 삭제 시 통계 정리"""
+    metrics = hass.data.get(DOMAIN, {}).get(DATA_METRICS)
+    if metrics:
+        metrics.remove_entry(entry.entry_id)
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
-    """옵션 변경 시 업데이트"""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """옵션 변경 시 업데이트 (엔티티 구성이 바뀌는 경우에만 다시 불러옴)"""
     _LOGGER.debug("설정 변경 감지: %s", entry.options)
+    sensor = hass.data[DOMAIN][DATA_COORDINATOR].entities.get(entry.entry_id)
+    if sensor is not None and sensor.async_apply_options(entry.options):
+        return
+    await hass.config_entries.async_reload(entry.entry_id)
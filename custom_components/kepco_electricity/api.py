@@ -0,0 +1,167 @@
+"""한전 요금계산 API 클라이언트"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import time
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import API_URL, DEFAULT_MAX_PARALLEL_REQUESTS
+from .metrics import SENT_TO_KEPCO, KepcoMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 10  # 초
+READ_TIMEOUT = 20  # 초
+
+RETRY_ATTEMPTS = 3  # 요청당 최대 시도 횟수
+RETRY_BASE_DELAY = 1  # 재시도 기본 대기 (초)
+RETRY_MAX_DELAY = 10  # 재시도 최대 대기 (초)
+FAILURE_THRESHOLD = 5  # 회로 차단까지 연속 실패 수
+BREAKER_RESET_SECONDS = 300  # 회로 차단 유지 시간 (초)
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "User-Agent": "Mozilla/5.0"
+}
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """지수 백오프 + 지터 대기 시간 (attempt는 0부터)"""
+    return min(maximum, base * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+class CircuitBreaker:
+    """연속 실패 시 일정 시간 동안 한전 API 호출을 차단
+
+    차단 시간이 지나면 한 번의 시험 호출을 허용하고(half-open), 성공하면 정상 상태로 돌아갑니다.
+    """
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self._failure_threshold = failure_threshold
+        self._reset_seconds = reset_seconds
+        self.failures = 0
+        self._opened_at: float | None = None
+        self._trial_running = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    @property
+    def retry_in(self) -> float:
+        """호출이 다시 허용될 때까지 남은 시간 (초)"""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self._reset_seconds - time.monotonic())
+
+    @property
+    def blocked(self) -> bool:
+        """지금 호출하면 차단되는지 여부 (allow 와 달리 시험 호출을 시작하지 않음)"""
+        return self._opened_at is not None and (self.retry_in > 0 or self._trial_running)
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        if self.retry_in > 0 or self._trial_running:
+            return False
+        self._trial_running = True
+        return True
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            _LOGGER.info("한전 API 호출 재개")
+        self.failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_running or self.failures >= self._failure_threshold:
+            if not self._trial_running:
+                _LOGGER.warning("한전 API 연속 %s회 실패, %s초 동안 호출 중단", self.failures, self._reset_seconds)
+            self._opened_at = time.monotonic()
+        self._trial_running = False
+
+
+class KepcoApiClient:
+    """모든 Config Entry가 공유하는 한전 API 클라이언트
+
+    HA가 관리하는 keep-alive 세션을 재사용해 매 호출마다 TCP/TLS 연결을 새로 맺지 않고,
+    연결/응답 타임아웃과 동시 요청 수를 제한합니다.
+    실패한 요청은 지수 백오프로 재시도하며, 연속 실패 시 회로 차단기로 호출을 멈춥니다.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, metrics: KepcoMetrics, max_connections: int = DEFAULT_MAX_PARALLEL_REQUESTS
+    ):
+        self._hass = hass
+        self._metrics = metrics
+        self._session = None
+        self._timeout = None
+        # 한전 서버 동시 요청 수 (조정자의 최대 동시 요청 설정과 같게 맞춤)
+        self._semaphore = asyncio.Semaphore(max_connections)
+        self.breaker = CircuitBreaker()
+
+    async def async_calculate(self, payload: dict, entry_id: str | None = None) -> dict | None:
+        """요금 계산 요청 (재시도 후에도 실패하거나 차단 중이면 None)"""
+        if not self.breaker.allow():
+            _LOGGER.debug("한전 API 호출 차단 중 (%.0f초 후 재시도)", self.breaker.retry_in)
+            return None
+
+        for attempt in range(RETRY_ATTEMPTS):
+            result = await self._async_post(payload, entry_id)
+            if result is not None:
+                self.breaker.record_success()
+                return result
+            if attempt < RETRY_ATTEMPTS - 1:
+                await asyncio.sleep(backoff_delay(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY))
+
+        self.breaker.record_failure()
+        return None
+
+    def _ensure_session(self) -> None:
+        """첫 호출 시 HA 공용 세션 준비"""
+        if self._session is not None:
+            return
+        self._session = async_get_clientsession(self._hass)
+        self._timeout = aiohttp.ClientTimeout(
+            total=CONNECT_TIMEOUT + READ_TIMEOUT,
+            connect=CONNECT_TIMEOUT,
+            sock_read=READ_TIMEOUT,
+        )
+
+    async def _async_post(self, payload: dict, entry_id: str | None = None) -> dict | None:
+        self._ensure_session()
+        data = json.dumps(payload)
+        async with self._semaphore:
+            # 실제로 보낸 요청만 집계 (재시도 포함)
+            self._metrics.increment(SENT_TO_KEPCO, entry_id)
+            started = time.monotonic()
+            try:
+                async with self._session.post(
+                    API_URL,
+                    data=data,
+                    headers=HEADERS,
+                    timeout=self._timeout,
+                ) as response:
+                    body = await response.read()
+                    if response.status != 200:
+                        self._metrics.observe_failure(time.monotonic() - started, len(data))
+                        _LOGGER.error("API 응답 오류: HTTP %s", response.status)
+                        return None
+                    self._metrics.observe_request(time.monotonic() - started, len(data), len(body))
+                    return json.loads(body)
+            except asyncio.TimeoutError:
+                self._metrics.observe_failure(time.monotonic() - started, len(data), timeout=True)
+                _LOGGER.error("API 호출 시간 초과")
+                return None
+            except Exception as e:
+                self._metrics.observe_failure(time.monotonic() - started, len(data))
+                _LOGGER.error("API 호출 실패: %s", e)
+                return None
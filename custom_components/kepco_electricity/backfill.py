@@ -0,0 +1,175 @@
+"""지난 검침 기간 요금을 장기 통계로 가져오기"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .billing import BillingPeriod, billing_period
+from .cache import tariff_key
+from .const import CALC_MODE_REMOTE, DATA_COORDINATOR, DEFAULT_CALC_MODE, DOMAIN
+from .sensor import build_payload
+from .tariff import calculate_bill
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.backfill"
+SAVE_DELAY = 5  # 진행 상황 저장 지연 (초)
+BACKFILL_CONCURRENCY = 4  # 동시에 처리할 검침 기간 수
+
+
+def statistic_id(entry: ConfigEntry) -> str:
+    """요금 외부 통계 ID"""
+    return f"{DOMAIN}:bill_{entry.entry_id.lower()}"
+
+
+def past_periods(meter_reading_day: int, offset: int, count: int, today: date) -> list[BillingPeriod]:
+    """이번 기간 이전 검침 기간 목록 (오래된 순)"""
+    periods = []
+    period = billing_period(meter_reading_day, offset, today)
+    for _ in range(count):
+        period = billing_period(meter_reading_day, offset, period.start - timedelta(days=1))
+        periods.append(period)
+    return list(reversed(periods))
+
+
+class KepcoBackfill:
+    """지난 검침 기간의 사용량을 레코더에서 읽어 요금을 계산하고 외부 통계로 가져옴
+
+    계산한 기간은 요금 조건과 함께 저장해 두어, 중단된 경우 다시 실행하면 남은 기간만 계산합니다.
+    요금 조건(계약종별, 할인, 검침일 오프셋)이 바뀐 기간은 다시 계산합니다.
+    로컬 계산 방식은 지난 기간에도 현재 요금표를 적용하므로, 그사이 요금이 바뀌었으면 실제 청구금액과 다를 수 있습니다.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._data: dict | None = None
+        self._semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+        self._load_lock = asyncio.Lock()
+
+    async def async_run(self, entry: ConfigEntry, count: int) -> dict:
+        """지난 count 개 기간 요금을 계산해 가져오기"""
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+        await self._async_load()
+        done = self._data.setdefault(entry.entry_id, {})
+
+        options = entry.options
+        periods = past_periods(
+            int(options.get("meter_reading_day", 25)),
+            int(options.get("meter_reading_day_offset", 0)),
+            count,
+            dt_util.now().date(),
+        )
+        if options.get("calculation_mode", DEFAULT_CALC_MODE) != CALC_MODE_REMOTE:
+            _LOGGER.info("지난 요금을 현재 요금표로 계산합니다: %s", entry.title)
+        recorder = get_instance(self._hass)
+        results = await asyncio.gather(
+            *(self._async_period_bill(recorder, entry, done, period) for period in periods)
+        )
+
+        # 누적 합계는 첫 기간 이전에 기록된 통계에 이어서 계산 (다시 실행하거나 기간 수를 줄여도 감소하지 않도록)
+        statistics = []
+        total = await self._async_sum_before(recorder, entry, periods[0]) if periods else 0
+        for period, bill in zip(periods, results):
+            if bill is None:
+                continue
+            total += bill
+            # 요금은 검침 기간 마지막 날 기준으로 기록
+            end_day = dt_util.start_of_local_day(period.end)
+            statistics.append(StatisticData(start=dt_util.as_utc(end_day), state=bill, sum=total))
+
+        if statistics:
+            metadata = StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=f"{options.get('sensor_name', 'Kepco Bill')} 청구금액",
+                source=DOMAIN,
+                statistic_id=statistic_id(entry),
+                unit_of_measurement="KRW",
+            )
+            async_add_external_statistics(self._hass, metadata, statistics)
+        await self._store.async_save(self._data)
+
+        _LOGGER.info("지난 요금 가져오기 완료: %s (%s/%s 기간)", entry.title, len(statistics), len(periods))
+        return {"periods": len(periods), "imported": len(statistics), "skipped": len(periods) - len(statistics)}
+
+    async def _async_load(self) -> None:
+        """저장된 진행 상황을 한 번만 불러옴 (여러 엔트리를 동시에 실행해도 같은 데이터 공유)"""
+        async with self._load_lock:
+            if self._data is None:
+                self._data = await self._store.async_load() or {}
+
+    async def _async_sum_before(self, recorder, entry: ConfigEntry, period: BillingPeriod) -> float:
+        """period 이전에 가져온 요금 통계의 누적 합계 (없으면 0)"""
+        from homeassistant.components.recorder.statistics import statistics_during_period
+
+        try:
+            stats = await recorder.async_add_executor_job(
+                statistics_during_period,
+                self._hass,
+                datetime.fromtimestamp(0, dt_util.UTC),
+                period.start_time,
+                {statistic_id(entry)},
+                "hour",
+                None,
+                {"sum"},
+            )
+        except Exception as e:
+            _LOGGER.debug("이전 요금 통계 조회 실패: %s", e)
+            return 0
+        rows = stats.get(statistic_id(entry))
+        return (rows[-1].get("sum") or 0) if rows else 0
+
+    async def _async_period_bill(self, recorder, entry: ConfigEntry, done: dict, period: BillingPeriod) -> int | None:
+        """한 기간의 요금 (이미 계산한 기간은 저장된 값 사용)"""
+        key = f"{period.start_ymd}-{period.end_ymd}"
+        tariff = tariff_key(build_payload(entry.options, period.bill_start_ymd, period.bill_end_ymd, 0))
+        if key in done and done[key].get("tariff") == tariff:
+            return done[key]["bill"]
+
+        from homeassistant.components.recorder.statistics import statistic_during_period
+
+        async with self._semaphore:
+            try:
+                stats = await recorder.async_add_executor_job(
+                    statistic_during_period,
+                    self._hass,
+                    period.start_time,
+                    period.end_time,
+                    entry.options.get("usage_entity"),
+                    {"change"},
+                    None,
+                )
+            except Exception as e:
+                _LOGGER.debug("사용량 통계 조회 실패 (%s): %s", key, e)
+                return None
+            change = stats.get("change")
+            if change is None:
+                return None
+            usage = max(0, int(change))
+
+            payload = build_payload(entry.options, period.bill_start_ymd, period.bill_end_ymd, usage)
+            if entry.options.get("calculation_mode", DEFAULT_CALC_MODE) == CALC_MODE_REMOTE:
+                # 실시간 계산보다 나중에 처리되도록 낮은 우선순위로 요청
+                res_obj = await self._hass.data[DOMAIN][DATA_COORDINATOR].async_calculate(
+                    payload, priority=2, entry_id=entry.entry_id
+                )
+            else:
+                res_obj = calculate_bill(payload["dma_reqParam"])
+            if not res_obj:
+                return None
+
+        bill = int(float(res_obj.get("costTotCharge", 0)))
+        done[key] = {"usage": usage, "bill": bill, "tariff": tariff}
+        self._store.async_delay_save(lambda: self._data, SAVE_DELAY)
+        return bill
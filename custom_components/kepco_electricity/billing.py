@@ -0,0 +1,157 @@
+"""검침 기간 계산"""
+from __future__ import annotations
+
+import calendar
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import cached_property, lru_cache
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def meter_date(year: int, month: int, meter_reading_day: int) -> date:
+    """해당 월의 검침일 (말일보다 크면 말일)"""
+    return date(year, month, min(meter_reading_day, calendar.monthrange(year, month)[1]))
+
+
+def _shift_month(year: int, month: int, months: int) -> tuple[int, int]:
+    index = year * 12 + month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+@dataclass(frozen=True)
+class BillingPeriod:
+    """검침 기간
+
+    start/end 는 검침일 기준 사용량 기간, bill_start/bill_end 는 오프셋을 적용한 요금 계산 기간입니다.
+    """
+
+    start: date
+    end: date
+    offset: int = 0
+
+    @cached_property
+    def bill_start(self) -> date:
+        return self.start + timedelta(days=self.offset)
+
+    @cached_property
+    def bill_end(self) -> date:
+        return self.end + timedelta(days=self.offset)
+
+    @cached_property
+    def start_ymd(self) -> str:
+        return self.start.strftime("%Y%m%d")
+
+    @cached_property
+    def end_ymd(self) -> str:
+        return self.end.strftime("%Y%m%d")
+
+    @cached_property
+    def bill_start_ymd(self) -> str:
+        return self.bill_start.strftime("%Y%m%d")
+
+    @cached_property
+    def bill_end_ymd(self) -> str:
+        return self.bill_end.strftime("%Y%m%d")
+
+    @cached_property
+    def start_time(self) -> datetime:
+        """기간 시작 시각 (HA 시간대 자정)"""
+        return dt_util.start_of_local_day(self.start)
+
+    @cached_property
+    def end_time(self) -> datetime:
+        """기간 종료 시각 (다음 기간 시작 자정)"""
+        return dt_util.start_of_local_day(self.end + timedelta(days=1))
+
+    def __contains__(self, day: date) -> bool:
+        return self.start <= day <= self.end
+
+    def elapsed_ratio(self, now: datetime) -> float:
+        """기간 중 지난 시간 비율 (0 ~ 1)"""
+        total = (self.end_time - self.start_time).total_seconds()
+        return min(1.0, max(0.0, (now - self.start_time).total_seconds() / total))
+
+
+@lru_cache(maxsize=128)
+def billing_period(meter_reading_day: int, offset: int, day: date) -> BillingPeriod:
+    """day 가 속한 검침 기간 (검침일부터 다음 검침일 전날까지)"""
+    this_month = meter_date(day.year, day.month, meter_reading_day)
+    if day < this_month:
+        start = meter_date(*_shift_month(day.year, day.month, -1), meter_reading_day)
+        end = this_month - timedelta(days=1)
+    else:
+        start = this_month
+        end = meter_date(*_shift_month(day.year, day.month, 1), meter_reading_day) - timedelta(days=1)
+    return BillingPeriod(start, end, offset)
+
+
+class BillingCalendar:
+    """Config Entry별 검침 기간
+
+    현재/다음 기간을 미리 계산해 두고, 기간이 바뀌는 시각(검침일 자정, HA 시간대)에
+    타이머 하나로 다음 기간으로 넘어갑니다.
+    """
+
+    def __init__(self, hass: HomeAssistant, meter_reading_day: int, offset: int):
+        self._hass = hass
+        self.meter_reading_day = int(meter_reading_day)
+        self.offset = int(offset)
+        self._current: BillingPeriod | None = None
+        self._next: BillingPeriod | None = None
+        self._on_rollover: Callable[[BillingPeriod], None] | None = None
+        self._unsub_timer: CALLBACK_TYPE | None = None
+
+    @property
+    def current(self) -> BillingPeriod:
+        """현재 검침 기간"""
+        today = dt_util.now().date()
+        if self._current is None or today not in self._current:
+            self._advance(today)
+        return self._current
+
+    @property
+    def next(self) -> BillingPeriod:
+        """다음 검침 기간"""
+        self.current
+        return self._next
+
+    def _advance(self, today: date) -> None:
+        if self._next is not None and today in self._next:
+            self._current = self._next
+        else:
+            self._current = billing_period(self.meter_reading_day, self.offset, today)
+        self._next = billing_period(self.meter_reading_day, self.offset, self._current.end + timedelta(days=1))
+
+    @callback
+    def async_start(self, on_rollover: Callable[[BillingPeriod], None]) -> CALLBACK_TYPE:
+        """기간 전환 타이머 시작 (정지 함수 반환)"""
+        self._on_rollover = on_rollover
+        self._async_schedule()
+        return self.async_stop
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    @callback
+    def _async_schedule(self) -> None:
+        self.async_stop()
+        self._unsub_timer = async_track_point_in_time(self._hass, self._async_rollover, self.current.end_time)
+
+    @callback
+    def _async_rollover(self, _now) -> None:
+        self._unsub_timer = None
+        period = self.current
+        _LOGGER.debug("검침 기간 전환: %s ~ %s", period.start, period.end)
+        self._async_schedule()
+        if self._on_rollover:
+            self._on_rollover(period)
@@ -0,0 +1,118 @@
+"""한전 요금계산 결과 캐시"""
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.cache"
+SAVE_DELAY = 30  # 디스크 저장 지연 (초)
+DEFAULT_CACHE_SIZE = 1000
+
+
+def tariff_key(payload: dict) -> str:
+    """요청 데이터 중 사용량을 제외하고 요금에 영향을 주는 항목 (검침 기간, 요금 조건)"""
+    req = payload["dma_reqParam"]
+    house = (req.get("houseList") or [{}])[0]
+    return "|".join(
+        str(value)
+        for value in (
+            req.get("chrgStYmd"),
+            req.get("chrgEndYmd"),
+            req.get("lhvClcd", "1"),
+            req.get("dwelClcd", "1"),
+            house.get("wlfrDcClcd1", "") or "",
+            house.get("wlfrDcClcd2", "") or "",
+        )
+    )
+
+
+def cache_key(payload: dict) -> str:
+    """요청 데이터 중 요금에 영향을 주는 항목만으로 키 생성"""
+    return f"{tariff_key(payload)}|{int(payload['dma_reqParam'].get('whmeMloadUski') or 0)}"
+
+
+def expires_for(payload: dict, expires: str | None = None) -> str:
+    """요청 결과 만료일 (YYYYMMDD, 사용량 기간 종료일을 모르면 요금 계산 종료일)"""
+    return expires or str(payload["dma_reqParam"]["chrgEndYmd"])
+
+
+def _today() -> str:
+    return dt_util.now().strftime("%Y%m%d")
+
+
+class KepcoResponseCache:
+    """요청 데이터별 `dma_resObj` 캐시 (메모리 LRU + HA Store 저장)
+
+    항목은 해당 검침 기간(사용량 기간)이 끝나면 만료됩니다.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_entries: int = DEFAULT_CACHE_SIZE):
+        self._hass = hass
+        self._max_entries = max_entries
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._data: OrderedDict[str, dict] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def async_load(self) -> None:
+        """디스크에서 캐시 복원 (만료 항목 제외)"""
+        stored = await self._store.async_load() or {}
+        today = _today()
+        for key, item in stored.get("entries", {}).items():
+            if item.get("expires", "") >= today:
+                self._data[key] = item
+        self._evict()
+        _LOGGER.debug("요금 캐시 복원: %s건", len(self._data))
+
+    def get(self, payload: dict) -> dict | None:
+        key = cache_key(payload)
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item["expires"] < _today():
+            del self._data[key]
+            self._schedule_save()
+            return None
+        self._data.move_to_end(key)
+        return item["result"]
+
+    def set(self, payload: dict, result: dict, expires: str | None = None) -> None:
+        """결과 저장 (expires 는 사용량 기간 종료일, `BillingPeriod.end_ymd`)"""
+        key = cache_key(payload)
+        self._data[key] = {
+            "expires": expires_for(payload, expires),
+            "result": result,
+        }
+        self._data.move_to_end(key)
+        self._evict()
+        self._schedule_save()
+
+    def purge_expired(self) -> None:
+        """검침 기간이 끝난 항목 삭제"""
+        today = _today()
+        expired = [key for key, item in self._data.items() if item["expires"] < today]
+        for key in expired:
+            del self._data[key]
+        if expired:
+            _LOGGER.debug("만료된 요금 캐시 삭제: %s건", len(expired))
+            self._schedule_save()
+
+    def _evict(self) -> None:
+        while len(self._data) > self._max_entries:
+            self._data.popitem(last=False)
+
+    def _schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _data_to_save(self) -> dict:
+        return {"entries": dict(self._data)}
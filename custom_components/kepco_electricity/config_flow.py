@@ -1,38 +1,104 @@
 import logging
 from homeassistant import config_entries
-from homeassistant.core import callback
-from homeassistant.helpers import selector
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er, selector
 from homeassistant.data_entry_flow import FlowResult
 import voluptuous as vol
-from datetime import datetime, timedelta
-from .const import DOMAIN
+from homeassistant.util import dt as dt_util
+from .billing import billing_period
+from .const import (
+    DOMAIN,
+    DATA_CACHE,
+    CALC_MODE_LOCAL,
+    CALC_MODE_REMOTE,
+    CALC_MODE_OFFLINE,
+    DEFAULT_CALC_MODE,
+    DEFAULT_API_CHECK_INTERVAL,
+    DEFAULT_TABLE_MAX_USAGE,
+    MAX_READING_DAY_OFFSET,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+# 월사용량 센서 선택 (에너지 센서만 표시)
+USAGE_ENTITY_SELECTOR = selector.EntitySelector(
+    selector.EntitySelectorConfig(domain="sensor", device_class=SensorDeviceClass.ENERGY)
+)
+
+
+def validate_usage_entity(hass: HomeAssistant, entity_id: str) -> str | None:
+    """월사용량 센서 확인 (엔티티 레지스트리/상태 단건 조회, kWh 단위만 허용). 오류 키 반환"""
+    if not entity_id or not entity_id.startswith("sensor."):
+        return "invalid_entity"
+    state = hass.states.get(entity_id)
+    registry_entry = er.async_get(hass).async_get(entity_id)
+    if state is None and registry_entry is None:
+        return "invalid_entity"
+    unit = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT) if state is not None else None
+    if unit is None and registry_entry is not None:
+        unit = registry_entry.unit_of_measurement
+    if unit != UnitOfEnergy.KILO_WATT_HOUR:
+        return "invalid_unit"
+    return None
+
+
+def convert_discount_codes(user_input: dict) -> dict:
+    """할인 코드 변환 (해당없음 → 빈 값)"""
+    user_input["wlfr_dc_clcd1"] = "" if user_input["wlfr_dc_clcd1"] == "none" else user_input["wlfr_dc_clcd1"]
+    user_input["wlfr_dc_clcd2"] = "" if user_input["wlfr_dc_clcd2"] == "none" else user_input["wlfr_dc_clcd2"]
+    return user_input
+
+
+def preview_placeholders(hass: HomeAssistant, options: dict) -> dict:
+    """선택한 옵션으로 이번 검침 기간 요금 미리보기 (캐시 또는 로컬 계산, 한전 API 호출 없음)"""
+    from .sensor import build_payload, usage_to_integer
+    from .tariff import calculate_bill
+
+    period = billing_period(
+        int(options.get("meter_reading_day", 25)), int(options.get("meter_reading_day_offset", 0)), dt_util.now().date()
+    )
+    usage = usage_to_integer(hass.states.get(options.get("usage_entity"))) or 0
+    elapsed_ratio = period.elapsed_ratio(dt_util.now())
+    predicted_usage = int(usage / elapsed_ratio) if elapsed_ratio > 0 else usage
+    cache = hass.data.get(DOMAIN, {}).get(DATA_CACHE)
+
+    def _bill(value: int) -> tuple[int, bool]:
+        payload = build_payload(options, period.bill_start_ymd, period.bill_end_ymd, value)
+        res_obj = cache.get(payload) if cache is not None else None
+        if res_obj is not None:
+            return int(float(res_obj.get("costTotCharge", 0))), True
+        return calculate_bill(payload["dma_reqParam"])["costTotCharge"], False
+
+    bill, cached = _bill(usage)
+    predicted_bill, _ = _bill(predicted_usage)
+    return {
+        "period": f"{period.bill_start.isoformat()} ~ {period.bill_end.isoformat()}",
+        "usage": str(usage),
+        "bill": f"{bill:,}",
+        "predicted_usage": str(predicted_usage),
+        "predicted_bill": f"{predicted_bill:,}",
+        "source": "한전 API 캐시" if cached else "로컬 계산",
+    }
+
 class KepcoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
     async def async_step_user(self, user_input=None) -> FlowResult:
         """GUI 설정 화면 처리"""
         errors = {}
-        entities = [e.entity_id for e in self.hass.states.async_all() if e.entity_id.startswith("sensor.")]
 
         if user_input is not None:
-            if user_input["usage_entity"] not in entities:
-                errors["base"] = "invalid_entity"
+            error = validate_usage_entity(self.hass, user_input["usage_entity"])
+            if error:
+                errors["base"] = error
 
             if not errors:
-                # 할인 코드 변환
-                user_input["wlfr_dc_clcd1"] = "" if user_input["wlfr_dc_clcd1"] == "none" else user_input["wlfr_dc_clcd1"]
-                user_input["wlfr_dc_clcd2"] = "" if user_input["wlfr_dc_clcd2"] == "none" else user_input["wlfr_dc_clcd2"]
-
+                convert_discount_codes(user_input)
                 user_input["sensor_name"] = user_input.get("sensor_name", "Kepco Bill")  # 센서 이름 저장
-
-                return self.async_create_entry(
-                    title=user_input["sensor_name"], 
-                    data={}, 
-                    options=user_input
-                )
+                self._user_input = user_input
+                return await self.async_step_preview()
 
         return self.async_show_form(
             step_id="user",
@@ -48,18 +114,13 @@ class KepcoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 ),
                 vol.Required("meter_reading_day_offset", default=0): selector.NumberSelector(
                     selector.NumberSelectorConfig(
-                        min=-5,
-                        max=5,
+                        min=-MAX_READING_DAY_OFFSET,
+                        max=MAX_READING_DAY_OFFSET,
                         step=1,
                         mode="box"
                     )
                 ),
-                vol.Required("usage_entity"): selector.EntitySelector(
-                    selector.EntitySelectorConfig(
-                        domain="sensor",
-                        multiple=False
-                    )
-                ),
+                vol.Required("usage_entity"): USAGE_ENTITY_SELECTOR,
                 vol.Required("lhv_clcd", default="1"): selector.SelectSelector(
                     selector.SelectSelectorConfig(
                         options=[
@@ -104,7 +165,36 @@ class KepcoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         ],
                         mode=selector.SelectSelectorMode.DROPDOWN
                     )
-                )
+                ),
+                vol.Required("calculation_mode", default=DEFAULT_CALC_MODE): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=[
+                            {"value": CALC_MODE_LOCAL, "label": "로컬 계산 (한전 API 주기적 검증)"},
+                            {"value": CALC_MODE_REMOTE, "label": "한전 API 호출"},
+                            {"value": CALC_MODE_OFFLINE, "label": "한전 API 우선 (연결할 수 없으면 기록된 응답/로컬 계산으로 추정)"}
+                        ],
+                        mode=selector.SelectSelectorMode.DROPDOWN
+                    )
+                ),
+                vol.Required("api_check_interval", default=DEFAULT_API_CHECK_INTERVAL): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        min=0,
+                        max=168,
+                        step=1,
+                        mode="box"
+                    )
+                ),
+                vol.Required("table_max_usage", default=DEFAULT_TABLE_MAX_USAGE): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        min=100,
+                        max=10000,
+                        step=100,
+                        mode="box"
+                    )
+                ),
+                vol.Required("component_sensors", default=False): selector.BooleanSelector(),
+                vol.Required("marginal_price_sensor", default=False): selector.BooleanSelector(),
+                vol.Required("diagnostic_sensors", default=False): selector.BooleanSelector()
             }),
             errors=errors,
             description_placeholders={
@@ -112,6 +202,20 @@ class KepcoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             }
         )
 
+    async def async_step_preview(self, user_input=None) -> FlowResult:
+        """저장 전 요금 미리보기"""
+        if user_input is not None:
+            return self.async_create_entry(
+                title=self._user_input["sensor_name"],
+                data={},
+                options=self._user_input
+            )
+        return self.async_show_form(
+            step_id="preview",
+            data_schema=vol.Schema({}),
+            description_placeholders=preview_placeholders(self.hass, self._user_input),
+        )
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
@@ -119,14 +223,8 @@ class KepcoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return KepcoOptionsFlow(config_entry)
         
     def _calculate_dates(self, day: int) -> str:
-        today = datetime.now()
-        try:
-            end_date = today.replace(day=day) - timedelta(days=1)
-        except ValueError:
-            end_date = (today.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-            end_date = end_date.replace(day=min(day, end_date.day))
-        start_date = end_date - timedelta(days=30)
-        return f"예시: {start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')}"
+        period = billing_period(day, 0, dt_util.now().date())
+        return f"예시: {period.start.isoformat()} ~ {period.end.isoformat()}"
 
 
 
@@ -140,16 +238,16 @@ class KepcoOptionsFlow(config_entries.OptionsFlow):
         return await self.async_step_user()
 
     async def async_step_user(self, user_input=None):
+        errors = {}
         if user_input is not None:
-            user_input["wlfr_dc_clcd1"] = "" if user_input["wlfr_dc_clcd1"] == "none" else user_input["wlfr_dc_clcd1"]
-            user_input["wlfr_dc_clcd2"] = "" if user_input["wlfr_dc_clcd2"] == "none" else user_input["wlfr_dc_clcd2"]
-            return self.async_create_entry(
-                title=user_input["sensor_name"],
-                data=user_input
-            )
-            
+            error = validate_usage_entity(self.hass, user_input["usage_entity"])
+            if error:
+                errors["base"] = error
+            else:
+                self._user_input = convert_discount_codes(user_input)
+                return await self.async_step_preview()
+
         options = self.config_entry.options
-        entities = [e.entity_id for e in self.hass.states.async_all() if e.entity_id.startswith("sensor.")]
 
         return self.async_show_form(
             step_id="user",
@@ -165,15 +263,13 @@ class KepcoOptionsFlow(config_entries.OptionsFlow):
                 ),
                 vol.Required("meter_reading_day_offset", default=options.get("meter_reading_day_offset", 0)): selector.NumberSelector(
                     selector.NumberSelectorConfig(
-                        min=-5,
-                        max=5,
+                        min=-MAX_READING_DAY_OFFSET,
+                        max=MAX_READING_DAY_OFFSET,
                         step=1,
                         mode="box"
                     )
                 ),
-                vol.Required("usage_entity", default=options.get("usage_entity")): selector.EntitySelector(
-                    selector.EntitySelectorConfig(domain="sensor")
-                ),
+                vol.Required("usage_entity", default=options.get("usage_entity")): USAGE_ENTITY_SELECTOR,
                 vol.Required("lhv_clcd", default=options.get("lhv_clcd", "1")): selector.SelectSelector(
                     selector.SelectSelectorConfig(
                         options=[
@@ -218,7 +314,50 @@ class KepcoOptionsFlow(config_entries.OptionsFlow):
                         ],
                         mode=selector.SelectSelectorMode.DROPDOWN
                     )
-                )
-            })
+                ),
+                vol.Required("calculation_mode", default=options.get("calculation_mode", DEFAULT_CALC_MODE)): selector.SelectSelector(
+                    selector.SelectSelectorConfig(
+                        options=[
+                            {"value": CALC_MODE_LOCAL, "label": "로컬 계산 (한전 API 주기적 검증)"},
+                            {"value": CALC_MODE_REMOTE, "label": "한전 API 호출"},
+                            {"value": CALC_MODE_OFFLINE, "label": "한전 API 우선 (연결할 수 없으면 기록된 응답/로컬 계산으로 추정)"}
+                        ],
+                        mode=selector.SelectSelectorMode.DROPDOWN
+                    )
+                ),
+                vol.Required("api_check_interval", default=options.get("api_check_interval", DEFAULT_API_CHECK_INTERVAL)): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        min=0,
+                        max=168,
+                        step=1,
+                        mode="box"
+                    )
+                ),
+                vol.Required("table_max_usage", default=options.get("table_max_usage", DEFAULT_TABLE_MAX_USAGE)): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        min=100,
+                        max=10000,
+                        step=100,
+                        mode="box"
+                    )
+                ),
+                vol.Required("component_sensors", default=options.get("component_sensors", False)): selector.BooleanSelector(),
+                vol.Required("marginal_price_sensor", default=options.get("marginal_price_sensor", False)): selector.BooleanSelector(),
+                vol.Required("diagnostic_sensors", default=options.get("diagnostic_sensors", False)): selector.BooleanSelector()
+            }),
+            errors=errors,
+        )
+
+    async def async_step_preview(self, user_input=None):
+        """저장 전 요금 미리보기"""
+        if user_input is not None:
+            return self.async_create_entry(
+                title=self._user_input["sensor_name"],
+                data=self._user_input
+            )
+        return self.async_show_form(
+            step_id="preview",
+            data_schema=vol.Schema({}),
+            description_placeholders=preview_placeholders(self.hass, self._user_input),
         )
         
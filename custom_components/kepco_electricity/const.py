@@ -1,2 +1,35 @@
 DOMAIN = "kepco_electricity"
 PLATFORMS = ["sensor"]
+
+DATA_CACHE = "cache"  # hass.data[DOMAIN] 내 공용 요금 캐시 키
+DATA_API = "api"  # hass.data[DOMAIN] 내 공용 API 클라이언트 키
+DATA_COORDINATOR = "coordinator"  # hass.data[DOMAIN] 내 공용 계산 조정자 키
+DATA_METRICS = "metrics"  # hass.data[DOMAIN] 내 계산 통계 키
+DATA_BACKFILL = "backfill"  # hass.data[DOMAIN] 내 지난 요금 가져오기 작업 키
+DATA_REPLAY = "replay"  # hass.data[DOMAIN] 내 한전 응답 기록/오프라인 추정 키
+DATA_TABLE_BUILDS = "table_builds"  # hass.data[DOMAIN] 내 생성 중인 공유 요금표 키
+
+# 모든 Config Entry가 공유하는 한전 API 호출 제한 (configuration.yaml 에서 변경 가능)
+CONF_REQUESTS_PER_SECOND = "requests_per_second"
+CONF_MAX_PARALLEL_REQUESTS = "max_parallel_requests"
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+DEFAULT_MAX_PARALLEL_REQUESTS = 4
+
+SERVICE_REFRESH_ALL = "refresh_all"
+SERVICE_BACKFILL_STATISTICS = "backfill_statistics"
+SERVICE_COMPARE_TARIFFS = "compare_tariffs"
+
+API_URL = "https://online.kepco.co.kr/pr/calcul/calcul"
+
+# 요금 계산 방식
+CALC_MODE_LOCAL = "local"
+CALC_MODE_REMOTE = "remote"
+CALC_MODE_OFFLINE = "offline"  # 한전 API 우선, 연결할 수 없으면 기록된 응답과 로컬 엔진으로 추정
+DEFAULT_CALC_MODE = CALC_MODE_LOCAL
+DEFAULT_API_CHECK_INTERVAL = 24  # 로컬 계산 결과를 한전 API로 검증하는 주기 (시간, 0이면 검증 안함)
+DEFAULT_TABLE_MAX_USAGE = 2000  # 검침 기간별 요금표를 미리 계산할 최대 사용량 (kWh)
+MAX_READING_DAY_OFFSET = 5  # 검침일 오프셋 최대 크기 (일, 설정 화면 -5 ~ +5)
+USAGE_DEBOUNCE_SECONDS = 5  # 사용량 엔티티 연속 변경을 묶는 시간 (초)
+RETRY_BASE_SECONDS = 30  # 요금 계산 실패 시 첫 재시도 대기 (초)
+RETRY_MAX_SECONDS = 1800  # 요금 계산 재시도 최대 대기 (초)
+RECONCILE_INTERVAL_SECONDS = 300  # 오프라인 추정 요금을 한전 API로 확인하는 최소 간격 (초)
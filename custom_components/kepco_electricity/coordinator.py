@@ -0,0 +1,147 @@
+"""한전 요금계산 요청 조정"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+
+from homeassistant.core import HomeAssistant
+
+from .api import KepcoApiClient
+from .cache import KepcoResponseCache, cache_key
+from .const import DEFAULT_MAX_PARALLEL_REQUESTS, DEFAULT_REQUESTS_PER_SECOND
+from .metrics import COALESCED, SERVED_CACHE, KepcoMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class KepcoCalculationCoordinator:
+    """모든 Config Entry의 한전 API 요청을 모아 처리
+
+    같은 요청 데이터로 동시에 들어온 계산은 한 번만 호출하고 결과를 함께 돌려줍니다.
+    요청은 우선순위 큐에 쌓인 뒤 초당 요청 수와 동시 요청 수 제한 안에서 처리되며,
+    사용량 변화가 큰 요청이 먼저 처리됩니다.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: KepcoApiClient,
+        cache: KepcoResponseCache,
+        metrics: KepcoMetrics,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        max_parallel: int = DEFAULT_MAX_PARALLEL_REQUESTS,
+    ):
+        self._hass = hass
+        self._api = api
+        self._cache = cache
+        self._metrics = metrics
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._interval = 1 / requests_per_second
+        self._next_slot = 0.0
+        self._rate_lock = asyncio.Lock()
+        self._max_parallel = max_parallel
+        self._workers: list[asyncio.Task] = []
+        self.entities = {}  # entry_id → 요금 센서
+
+    @property
+    def pending(self) -> int:
+        """대기 중인 한전 API 요청 수"""
+        return self._queue.qsize()
+
+    async def async_calculate(
+        self, payload: dict, priority: float = 0, entry_id: str | None = None, expires: str | None = None
+    ) -> dict | None:
+        """요금 계산 결과(`dma_resObj`) 조회 (캐시 → 진행 중인 요청 → 한전 API 순)
+
+        priority 값이 작을수록 먼저 처리됩니다. expires 는 캐시 만료일(사용량 기간 종료일)입니다.
+        """
+        res_obj = self._cache.get(payload)
+        if res_obj is not None:
+            _LOGGER.debug("캐시된 요금 사용")
+            self._metrics.increment(SERVED_CACHE, entry_id)
+            return res_obj
+
+        key = cache_key(payload)
+        future = self._inflight.get(key)
+        if future is not None:
+            _LOGGER.debug("진행 중인 동일 요청 결과 공유: %s", key)
+            self._metrics.increment(COALESCED, entry_id)
+        else:
+            future = self._hass.loop.create_future()
+            future.add_done_callback(lambda done: self._async_request_done(key, done))
+            self._inflight[key] = future
+            self._ensure_workers()
+            self._queue.put_nowait((priority, next(self._sequence), payload, entry_id, expires, future))
+        return await asyncio.shield(future)
+
+    def _async_request_done(self, key: str, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        # 기다리던 엔티티가 모두 취소된 경우에도 예외가 조회되지 않았다는 경고 방지
+        if not future.cancelled():
+            future.exception()
+
+    def _ensure_workers(self) -> None:
+        if self._workers:
+            return
+        self._workers = [
+            self._hass.async_create_background_task(
+                self._async_worker(), f"kepco_electricity calculation worker {index}"
+            )
+            for index in range(self._max_parallel)
+        ]
+
+    async def _async_worker(self) -> None:
+        while True:
+            _, _, payload, entry_id, expires, future = await self._queue.get()
+            try:
+                if future.done():
+                    continue
+                if self._api.breaker.blocked:
+                    # 회로 차단 중에는 호출하지 않으므로 요청 수 제한 대기 없이 실패 처리
+                    res_obj = None
+                else:
+                    await self._async_wait_rate_limit()
+                    res_obj = await self._async_request(payload, entry_id, expires)
+                if not future.done():
+                    future.set_result(res_obj)
+            except asyncio.CancelledError:
+                if not future.done():
+                    future.cancel()
+                raise
+            except Exception as err:
+                if not future.done():
+                    future.set_exception(err)
+            finally:
+                self._queue.task_done()
+
+    async def _async_wait_rate_limit(self) -> None:
+        """초당 요청 수 제한에 맞춰 다음 호출 시점까지 대기"""
+        async with self._rate_lock:
+            now = self._hass.loop.time()
+            wait = self._next_slot - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_slot = max(now, self._next_slot) + self._interval
+
+    async def _async_request(
+        self, payload: dict, entry_id: str | None = None, expires: str | None = None
+    ) -> dict | None:
+        response = await self._api.async_calculate(payload, entry_id)
+        _LOGGER.debug("API 호출")
+        if not response or "dma_resObj" not in response:
+            return None
+        res_obj = response["dma_resObj"]
+        self._cache.set(payload, res_obj, expires)
+        return res_obj
+
+    async def async_shutdown(self, _event=None) -> None:
+        """대기 중인 요청과 작업자 정리"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for future in list(self._inflight.values()):
+            future.cancel()
@@ -0,0 +1,32 @@
+"""KEPCO 전기요금 진단 정보"""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_API, DATA_CACHE, DATA_COORDINATOR, DATA_METRICS, DATA_REPLAY
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Config Entry 진단 정보 (옵션, 엔트리별/전체 계산 통계, API 상태)"""
+    data = hass.data[DOMAIN]
+    metrics = data[DATA_METRICS]
+    breaker = data[DATA_API].breaker
+    return {
+        "options": dict(entry.options),
+        "entry_metrics": metrics.as_dict(entry.entry_id),
+        "global_metrics": metrics.as_dict(),
+        "api": {
+            "circuit_open": breaker.is_open,
+            "consecutive_failures": breaker.failures,
+            "retry_in_seconds": round(breaker.retry_in, 1),
+            "pending_requests": data[DATA_COORDINATOR].pending,
+        },
+        "cache_entries": len(data[DATA_CACHE]),
+        "replay": {
+            "recorded_curves": data[DATA_REPLAY].curves,
+            "pending_reconcile": data[DATA_REPLAY].pending,
+        },
+    }
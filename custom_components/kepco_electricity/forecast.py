@@ -0,0 +1,154 @@
+"""월사용량 예측"""
+from __future__ import annotations
+
+import logging
+import math
+from datetime import datetime, timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+HISTORY_DAYS = 56  # 처음 학습할 때 읽어오는 기간 (일)
+REFIT_INTERVAL = timedelta(hours=1)  # 최소 재학습 간격
+DECAY = 0.2  # 시간대별 평균의 지수 가중치 (최근 약 5주 중심)
+MIN_SAMPLES = 24  # 예측에 필요한 최소 학습 시간 수
+Z_95 = 1.96  # 95% 신뢰구간
+SLOTS = 7 * 24  # 요일 × 시간
+
+
+def _slot(moment: datetime) -> int:
+    local = dt_util.as_local(moment)
+    return local.weekday() * 24 + local.hour
+
+
+def _to_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return dt_util.utc_from_timestamp(value)
+
+
+class UsageForecast:
+    """요일·시간대별 시간당 사용량 모델
+
+    레코더의 시간별 장기 통계에서 시간당 사용량을 읽어 168개(요일 × 시간) 구간의
+    지수 가중 평균/분산 배열에 누적합니다. 재학습 시에는 마지막으로 반영한 시간 이후만 읽습니다.
+    """
+
+    def __init__(self, entity_id: str):
+        self.entity_id = entity_id
+        self._mean = [0.0] * SLOTS
+        self._var = [0.0] * SLOTS
+        self._count = [0] * SLOTS
+        self._last_value: float | None = None
+        self._last_start: datetime | None = None
+        self._last_fit: datetime | None = None
+
+    @property
+    def samples(self) -> int:
+        return sum(self._count)
+
+    @property
+    def ready(self) -> bool:
+        return self.samples >= MIN_SAMPLES
+
+    async def async_refit(self, hass: HomeAssistant) -> None:
+        """새로 쌓인 시간별 통계만 반영 (최대 한 시간에 한 번)"""
+        now = dt_util.utcnow()
+        if self._last_fit is not None and now - self._last_fit < REFIT_INTERVAL:
+            return
+        self._last_fit = now
+        if "recorder" not in hass.config.components:
+            return
+
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.statistics import statistics_during_period
+
+        start = self._last_start + timedelta(hours=1) if self._last_start else now - timedelta(days=HISTORY_DAYS)
+        try:
+            stats = await get_instance(hass).async_add_executor_job(
+                statistics_during_period,
+                hass,
+                start,
+                now,
+                {self.entity_id},
+                "hour",
+                None,
+                {"state", "sum"},
+            )
+        except Exception as e:
+            _LOGGER.debug("사용량 통계 조회 실패: %s", e)
+            return
+        rows = stats.get(self.entity_id, [])
+        self.fold(rows)
+        _LOGGER.debug("사용량 예측 모델 갱신: 새 통계 %s건, 학습 %s시간", len(rows), self.samples)
+
+    def fold(self, rows: list[dict]) -> None:
+        """시간별 통계 행을 시간당 사용량으로 바꿔 모델에 반영"""
+        for row in rows:
+            value = row.get("sum")
+            if value is None:
+                value = row.get("state")
+            if value is None:
+                continue
+            start = _to_datetime(row["start"])
+            last_value, last_start = self._last_value, self._last_start
+            self._last_value, self._last_start = value, start
+            if last_value is None or start - last_start != timedelta(hours=1):
+                # 첫 행이거나 중간에 빠진 시간이 있으면 기준값만 갱신
+                continue
+            # 월사용량 센서가 초기화된 경우 초기화 이후 사용량만 반영
+            usage = value - last_value if value >= last_value else value
+            slot = _slot(start)
+            if self._count[slot] == 0:
+                self._mean[slot] = usage
+            else:
+                diff = usage - self._mean[slot]
+                self._mean[slot] += DECAY * diff
+                self._var[slot] = (1 - DECAY) * (self._var[slot] + DECAY * diff * diff)
+            self._count[slot] += 1
+
+    def predict(self, usage: float, now: datetime, end: datetime) -> tuple[float, float, float] | None:
+        """기간 종료 시점 예상 사용량 (예상, 하한, 상한). 학습 데이터가 부족하면 None"""
+        if not self.ready:
+            return None
+
+        known = [index for index in range(SLOTS) if self._count[index]]
+        fallback_mean = sum(self._mean[index] for index in known) / len(known)
+        fallback_var = sum(self._var[index] for index in known) / len(known)
+        means = [self._mean[index] if self._count[index] else fallback_mean for index in range(SLOTS)]
+        variances = [self._var[index] if self._count[index] else fallback_var for index in range(SLOTS)]
+
+        # 남은 기간의 시간대별 가중치 (현재 시간은 남은 비율만큼)
+        weights = [0.0] * SLOTS
+        hour_start = now.replace(minute=0, second=0, microsecond=0)
+        weights[_slot(hour_start)] += 1 - (now - hour_start).total_seconds() / 3600
+        moment = hour_start + timedelta(hours=1)
+        while moment < end:
+            weights[_slot(moment)] += 1
+            moment += timedelta(hours=1)
+
+        expected = usage + sum(w * m for w, m in zip(weights, means))
+        spread = Z_95 * math.sqrt(sum(w * v for w, v in zip(weights, variances)))
+        return expected, max(usage, expected - spread), expected + spread
+
+    def crossing_time(self, usage: float, target: float, now: datetime, end: datetime) -> datetime | None:
+        """시간대별 평균 사용량으로 target kWh에 도달할 예상 시각 (기간 내 도달하지 않으면 None)"""
+        if not self.ready:
+            return None
+        known = [index for index in range(SLOTS) if self._count[index]]
+        fallback_mean = sum(self._mean[index] for index in known) / len(known)
+
+        hour_start = now.replace(minute=0, second=0, microsecond=0)
+        moment, remaining = now, target - usage
+        while remaining > 0 and moment < end:
+            slot = _slot(moment)
+            rate = self._mean[slot] if self._count[slot] else fallback_mean  # kWh/시간
+            hour_end = min(hour_start + timedelta(hours=1), end)
+            hours = (hour_end - moment).total_seconds() / 3600
+            if rate * hours >= remaining:
+                return moment + timedelta(hours=remaining / rate)
+            remaining -= rate * hours
+            moment = hour_start = hour_end
+        return moment if remaining <= 0 else None
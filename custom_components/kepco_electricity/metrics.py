@@ -0,0 +1,106 @@
+"""요금 계산 실행 통계"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter
+
+# 카운터 이름
+REQUESTED = "requested"  # 계산 요청 (사용량을 읽은 업데이트)
+SKIPPED_UNCHANGED = "skipped_unchanged"  # 정수 사용량 변화 없음
+SERVED_LOCAL = "served_local"  # 로컬 요금 엔진/요금표
+SERVED_CACHE = "served_cache"  # 캐시
+SERVED_OFFLINE = "served_offline"  # 한전 API 연결 불가 시 기록된 응답/로컬 엔진 추정
+COALESCED = "coalesced"  # 진행 중인 동일 요청 공유
+SENT_TO_KEPCO = "sent_to_kepco"  # 한전 API 호출 (실제로 보낸 요청, 재시도 포함)
+FAILED = "failed"  # 계산 실패
+
+COUNTERS = (REQUESTED, SKIPPED_UNCHANGED, SERVED_LOCAL, SERVED_CACHE, SERVED_OFFLINE, COALESCED, SENT_TO_KEPCO, FAILED)
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # 초
+
+
+class LatencyHistogram:
+    """한전 API 응답 시간 분포"""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self._counts[bisect_left(self._buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> dict:
+        labels = [f"<={bucket}s" for bucket in self._buckets] + [f">{self._buckets[-1]}s"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean * 1000, 1) if self.count else None,
+            "max_ms": round(self.max * 1000, 1),
+            "buckets": dict(zip(labels, self._counts)),
+        }
+
+
+class KepcoMetrics:
+    """전체 및 Config Entry별 계산 카운터, 한전 API 응답 시간과 전송량"""
+
+    def __init__(self):
+        self.counters: Counter = Counter()
+        self.entries: dict[str, Counter] = {}
+        self.latency = LatencyHistogram()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.api_timeouts = 0
+        self.api_errors = 0
+
+    def increment(self, name: str, entry_id: str | None = None) -> None:
+        self.counters[name] += 1
+        if entry_id is not None:
+            self.entries.setdefault(entry_id, Counter())[name] += 1
+
+    def observe_request(self, seconds: float, sent: int, received: int) -> None:
+        self.latency.observe(seconds)
+        self.bytes_sent += sent
+        self.bytes_received += received
+
+    def observe_failure(self, seconds: float, sent: int, timeout: bool = False) -> None:
+        """응답을 받지 못했거나 오류 응답인 한전 API 호출 (걸린 시간 포함)"""
+        self.latency.observe(seconds)
+        self.bytes_sent += sent
+        if timeout:
+            self.api_timeouts += 1
+        else:
+            self.api_errors += 1
+
+    def remove_entry(self, entry_id: str) -> None:
+        self.entries.pop(entry_id, None)
+
+    def get(self, name: str, entry_id: str | None = None) -> int:
+        counters = self.counters if entry_id is None else self.entries.get(entry_id, Counter())
+        return counters[name]
+
+    def cache_hit_rate(self, entry_id: str | None = None) -> float | None:
+        """한전 API가 필요한 계산 중 캐시/동일 요청 공유로 처리한 비율 (%)"""
+        hits = self.get(SERVED_CACHE, entry_id) + self.get(COALESCED, entry_id)
+        total = hits + self.get(SENT_TO_KEPCO, entry_id)
+        return round(hits / total * 100, 1) if total else None
+
+    def as_dict(self, entry_id: str | None = None) -> dict:
+        counters = self.counters if entry_id is None else self.entries.get(entry_id, Counter())
+        data = {name: counters[name] for name in COUNTERS}
+        data["cache_hit_rate"] = self.cache_hit_rate(entry_id)
+        if entry_id is None:
+            data["api_latency"] = self.latency.as_dict()
+            data["bytes_sent"] = self.bytes_sent
+            data["bytes_received"] = self.bytes_received
+            data["api_timeouts"] = self.api_timeouts
+            data["api_errors"] = self.api_errors
+        return data
@@ -0,0 +1,190 @@
+"""한전 응답 기록 및 오프라인 요금 추정"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from bisect import bisect_left
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .cache import KepcoResponseCache, expires_for, tariff_key
+from .const import DATA_API, DATA_COORDINATOR, DOMAIN, RECONCILE_INTERVAL_SECONDS
+from .tariff import FUND_RATE, VAT_RATE, calculate_bill, charge_totals
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.replay"
+SAVE_DELAY = 30  # 디스크 저장 지연 (초)
+MAX_POINTS = 200  # 요금 곡선별 최대 기록 수
+
+
+def _apply_drift(res_obj: dict, drift: float) -> None:
+    """청구금액 차이를 전기요금(세전)에 반영하고 부가가치세/기금/청구금액을 다시 계산 (요금 항목 합계 유지)"""
+    elec = max(0, res_obj["costElecUse"] + round(drift / (1 + VAT_RATE + FUND_RATE)))
+    vat, fund, total = charge_totals(elec)
+    res_obj.update(costElecUse=elec, costAddTax=vat, costElecFund=fund, costTotCharge=total)
+
+
+def _engine_total(payload: dict, usage: int) -> int:
+    req_param = payload["dma_reqParam"]
+    return calculate_bill({**req_param, "whmeMloadUski": str(usage)})["costTotCharge"]
+
+
+class KepcoReplay:
+    """한전 API 응답을 요금 곡선별 (사용량 → 총 청구금액)으로 기록하고, 연결할 수 없을 때 요금 추정
+
+    추정은 로컬 요금 엔진 결과에 기록된 한전 응답과의 차이(앞뒤 기록 사용량 사이 선형 보간)를 더해 구하며,
+    차이는 세전 전기요금에 반영한 뒤 부가가치세/기금/청구금액을 다시 계산해 요금 항목이 청구금액과 맞도록 합니다.
+    추정으로 답한 엔트리는 마지막 요청만 남겨 두었다가, 한전 API가 다시 응답하면 엔트리당 한 번만 확인합니다.
+    """
+
+    def __init__(self, hass: HomeAssistant, cache: KepcoResponseCache):
+        self._hass = hass
+        self._cache = cache
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._curves: dict[str, dict] = {}  # tariff_key → {"expires": 종료일, "points": {사용량: 청구금액}}
+        self._pending: dict[str, dict] = {}  # entry_id → 추정으로 답한 마지막 요청 {"payload", "expires"}
+        self._cancel_reconcile: CALLBACK_TYPE | None = None
+        self._reconciling = False
+
+    @property
+    def curves(self) -> int:
+        return len(self._curves)
+
+    @property
+    def pending(self) -> int:
+        """한전 API 확인을 기다리는 엔트리 수"""
+        return len(self._pending)
+
+    async def async_load(self) -> None:
+        """디스크에서 기록 복원 (검침 기간이 끝난 곡선 제외)"""
+        stored = await self._store.async_load() or {}
+        today = dt_util.now().strftime("%Y%m%d")
+        for key, curve in stored.get("curves", {}).items():
+            if curve.get("expires", "") >= today:
+                curve["points"] = {int(usage): total for usage, total in curve["points"].items()}
+                self._curves[key] = curve
+        self._pending = {
+            # 이전 형식(요청 데이터만 저장)은 만료일 없이 복원
+            entry_id: item if "payload" in item else {"payload": item, "expires": None}
+            for entry_id, item in stored.get("pending", {}).items()
+        }
+        _LOGGER.debug("한전 응답 기록 복원: 요금 곡선 %s개, 확인 대기 %s건", len(self._curves), len(self._pending))
+        if self._pending:
+            self._async_schedule_reconcile()
+
+    def record(self, payload: dict, res_obj: dict, entry_id: str | None = None, expires: str | None = None) -> None:
+        """한전 API 응답 기록 (해당 엔트리의 확인 대기 요청은 해제, expires 는 사용량 기간 종료일)"""
+        key = tariff_key(payload)
+        if key not in self._curves:
+            # 새 요금 곡선을 만들 때 검침 기간이 끝난 곡선 정리
+            today = dt_util.now().strftime("%Y%m%d")
+            for expired in [k for k, curve in self._curves.items() if curve["expires"] < today]:
+                del self._curves[expired]
+        curve = self._curves.setdefault(key, {"expires": expires_for(payload, expires), "points": {}})
+        if expires:
+            curve["expires"] = expires
+        points = curve["points"]
+        usage = int(payload["dma_reqParam"].get("whmeMloadUski") or 0)
+        points.pop(usage, None)
+        points[usage] = int(float(res_obj.get("costTotCharge", 0)))
+        while len(points) > MAX_POINTS:
+            points.pop(next(iter(points)))
+        if entry_id is not None:
+            self._pending.pop(entry_id, None)
+        self._schedule_save()
+
+    def estimate(self, payload: dict, entry_id: str | None = None, expires: str | None = None) -> dict:
+        """기록된 응답과 로컬 엔진으로 요금 추정 (entry_id 를 주면 한전 API 확인 대기로 등록)"""
+        if entry_id is not None:
+            self._pending[entry_id] = {"payload": payload, "expires": expires}
+            self._schedule_save()
+            self._async_schedule_reconcile()
+
+        res_obj = self._cache.get(payload)
+        if res_obj is not None:
+            return res_obj
+
+        res_obj = calculate_bill(payload["dma_reqParam"])
+        curve = self._curves.get(tariff_key(payload))
+        if curve and curve["points"]:
+            usage = int(payload["dma_reqParam"].get("whmeMloadUski") or 0)
+            drift = self._drift(payload, curve["points"], usage)
+            if drift:
+                _apply_drift(res_obj, drift)
+        return res_obj
+
+    def _drift(self, payload: dict, points: dict, usage: int) -> float:
+        """사용량 앞뒤 기록에서 한전 응답과 로컬 엔진 결과 차이를 선형 보간"""
+        usages = sorted(points)
+        index = bisect_left(usages, usage)
+        neighbours = usages[max(0, index - 1):index + 1]
+        drifts = [points[u] - _engine_total(payload, u) for u in neighbours]
+        if len(neighbours) == 1 or neighbours[0] == neighbours[-1]:
+            return drifts[0]
+        low, high = neighbours
+        return drifts[0] + (drifts[1] - drifts[0]) * (usage - low) / (high - low)
+
+    @callback
+    def _async_schedule_reconcile(self, delay: float = RECONCILE_INTERVAL_SECONDS) -> None:
+        if self._cancel_reconcile is not None or self._reconciling:
+            return
+        delay = max(delay, self._hass.data[DOMAIN][DATA_API].breaker.retry_in)
+        self._cancel_reconcile = async_call_later(self._hass, delay, self._async_reconcile)
+
+    async def _async_reconcile(self, _now=None) -> None:
+        """추정으로 답한 엔트리별 마지막 요청만 한전 API로 확인하고 요금 센서 갱신"""
+        self._cancel_reconcile = None
+        if not self._pending:
+            return
+        coordinator = self._hass.data[DOMAIN][DATA_COORDINATOR]
+        self._reconciling = True
+        try:
+            pending = list(self._pending.items())
+            # 첫 요청으로 연결을 확인한 뒤 나머지를 한 번에 요청
+            entry_id, item = pending[0]
+            if not await self._async_check(coordinator, entry_id, item):
+                return
+            await asyncio.gather(
+                *(self._async_check(coordinator, entry_id, item) for entry_id, item in pending[1:])
+            )
+        finally:
+            self._reconciling = False
+            if self._pending:
+                self._async_schedule_reconcile()
+        _LOGGER.info("오프라인 추정 요금 확인: %s건 (남은 확인 %s건)", len(pending), len(self._pending))
+
+    async def _async_check(self, coordinator, entry_id: str, item: dict) -> bool:
+        payload, expires = item["payload"], item["expires"]
+        try:
+            res_obj = await coordinator.async_calculate(payload, priority=1, entry_id=entry_id, expires=expires)
+        except Exception as e:
+            _LOGGER.debug("오프라인 추정 요금 확인 실패: %s", e)
+            return False
+        if not res_obj:
+            return False
+        if self._pending.get(entry_id) is item:
+            self.record(payload, res_obj, entry_id, expires)
+        else:
+            # 확인 중 새 추정이 생긴 경우 그 요청은 다음 확인에서 처리
+            self.record(payload, res_obj, expires=expires)
+        sensor = coordinator.entities.get(entry_id)
+        if sensor is not None:
+            await sensor.async_force_refresh()
+        return True
+
+    @callback
+    def async_shutdown(self, _event=None) -> None:
+        if self._cancel_reconcile is not None:
+            self._cancel_reconcile()
+            self._cancel_reconcile = None
+
+    def _schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _data_to_save(self) -> dict:
+        return {"curves": self._curves, "pending": self._pending}
@@ -0,0 +1,91 @@
+"""요금 조건 비교 (what-if)"""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .billing import billing_period
+from .cache import cache_key
+from .const import CALC_MODE_REMOTE, DATA_COORDINATOR, DEFAULT_CALC_MODE, DOMAIN
+from .sensor import build_payload, usage_to_integer
+from .tariff import RESULT_FIELDS, calculate_bill
+
+_LOGGER = logging.getLogger(__name__)
+
+SCENARIO_OPTIONS = ("lhv_clcd", "dwel_clcd", "wlfr_dc_clcd1", "wlfr_dc_clcd2")
+
+
+def _scenario_options(base: dict, scenario: dict) -> dict:
+    options = dict(base)
+    for key in SCENARIO_OPTIONS:
+        if key in scenario:
+            value = str(scenario[key])
+            options[key] = "" if value == "none" else value
+    return options
+
+
+async def async_compare_scenarios(hass: HomeAssistant, entry: ConfigEntry, scenarios: list[dict]) -> dict:
+    """여러 요금 조건의 요금을 한 번에 계산
+
+    각 조건은 현재 설정/사용량을 기준으로 usage(kWh) 또는 usage_delta(kWh)와
+    계약종별/주거구분/할인 코드를 바꿔 지정합니다. 같은 요청 데이터는 한 번만 계산하며,
+    한전 API 계산 방식이면 공용 조정자(캐시, 동일 요청 공유, 호출 제한)를 거칩니다.
+    """
+    options = entry.options
+    current_usage = usage_to_integer(hass.states.get(options.get("usage_entity"))) or 0
+    period = billing_period(
+        int(options.get("meter_reading_day", 25)), int(options.get("meter_reading_day_offset", 0)), dt_util.now().date()
+    )
+    start_date, end_date = period.bill_start_ymd, period.bill_end_ymd
+    remote = options.get("calculation_mode", DEFAULT_CALC_MODE) == CALC_MODE_REMOTE
+
+    payloads = []
+    for scenario in [{"name": "현재"}, *scenarios]:
+        usage = int(scenario.get("usage", current_usage)) + int(scenario.get("usage_delta", 0))
+        payloads.append((scenario, build_payload(_scenario_options(options, scenario), start_date, end_date, max(0, usage))))
+
+    async def _async_calculate(payload):
+        if remote:
+            return await hass.data[DOMAIN][DATA_COORDINATOR].async_calculate(
+                payload, entry_id=entry.entry_id, expires=period.end_ymd
+            )
+        return calculate_bill(payload["dma_reqParam"])
+
+    # 같은 조건은 한 번만 계산
+    unique = {}
+    for _, payload in payloads:
+        unique.setdefault(cache_key(payload), payload)
+    keys = list(unique)
+    results = dict(zip(keys, await asyncio.gather(*(_async_calculate(unique[key]) for key in keys))))
+
+    rows = []
+    for scenario, payload in payloads:
+        req = payload["dma_reqParam"]
+        house = req["houseList"][0]
+        res_obj = results[cache_key(payload)]
+        rows.append({
+            "name": scenario.get("name", ""),
+            "usage": int(req["whmeMloadUski"]),
+            "lhv_clcd": req["lhvClcd"],
+            "dwel_clcd": req["dwelClcd"],
+            "wlfr_dc_clcd1": house["wlfrDcClcd1"],
+            "wlfr_dc_clcd2": house["wlfrDcClcd2"],
+            "bill": int(float(res_obj.get("costTotCharge", 0))) if res_obj else None,
+            "components": {field: res_obj.get(field, 0) for field in RESULT_FIELDS} if res_obj else None,
+        })
+
+    base_bill = rows[0]["bill"]
+    for row in rows:
+        row["difference"] = row["bill"] - base_bill if row["bill"] is not None and base_bill is not None else None
+
+    _LOGGER.debug("요금 비교: 조건 %s개, 계산 %s회", len(rows), len(keys))
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "current": rows[0],
+        "scenarios": rows[1:],
+    }
@@ -1,56 +1,164 @@
-import aiohttp
+import asyncio
 import logging
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorEntity,
     SensorDeviceClass,
     SensorStateClass,
 )
+from homeassistant.const import EntityCategory
+from homeassistant.core import Event, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_call_later, async_track_state_change_event
 from homeassistant.helpers.restore_state import RestoreEntity
-from .const import DOMAIN
+from homeassistant.helpers.start import async_at_started
+from homeassistant.util import dt as dt_util
+from .const import (
+    DOMAIN,
+    DATA_API,
+    DATA_CACHE,
+    DATA_COORDINATOR,
+    DATA_METRICS,
+    DATA_REPLAY,
+    DATA_TABLE_BUILDS,
+    CALC_MODE_LOCAL,
+    CALC_MODE_OFFLINE,
+    CALC_MODE_REMOTE,
+    DEFAULT_CALC_MODE,
+    DEFAULT_API_CHECK_INTERVAL,
+    DEFAULT_TABLE_MAX_USAGE,
+    USAGE_DEBOUNCE_SECONDS,
+    RETRY_BASE_SECONDS,
+    RETRY_MAX_SECONDS,
+)
+from .api import backoff_delay
+from .billing import BillingCalendar
+from .forecast import UsageForecast
+from .metrics import FAILED, REQUESTED, SENT_TO_KEPCO, SERVED_LOCAL, SERVED_OFFLINE, SKIPPED_UNCHANGED
+from .tariff import DISCOUNT_FIELDS, bill_table, calculate_bill, period_for
 from datetime import datetime, timedelta
 
 _LOGGER = logging.getLogger(__name__)
 
-def calculate_billing_period(meter_reading_day: int, offset: int):
-    """검침일을 기준으로 start_date와 end_date 계산"""
+SCAN_INTERVAL = timedelta(minutes=1)  # 진단 센서 갱신 주기 (요금 센서는 폴링하지 않음)
 
-    today = datetime.today()
-    
-    # 이번 달 첫 날과 마지막 날
-    first_day_this_month = today.replace(day=1)
-    
-    # 이번 달 검침일
+# 요금 항목 센서로 분리할 수 있는 속성 (항목 센서 사용 시 요금 센서 속성에서 제외)
+COST_ATTRIBUTES = (
+    "기본 요금",
+    "전력량 요금",
+    "연료비조정 요금",
+    "기후환경 요금",
+    "전기 요금",
+    "부가가치세",
+    "전력산업기반 기금",
+    "복지 할인",
+    "다자녀 할인",
+    "출산가구 할인",
+    "대가족 할인",
+    "산업용 할인",
+    "교육용 할인",
+    "저소득층 할인",
+    "주거복지 할인",
+    "사회적배려계층 할인",
+    "장애인 할인",
+    "국가유공자 할인",
+    "요금동결 할인",
+    "200kWh 이하 할인",
+    "총 청구금액",
+)
+
+def total_discount(res_obj) -> int:
+    """할인 합계 (복지/대가족 할인 + 요금동결 할인 + 200kWh 이하 할인)"""
+    house_cost = res_obj.get("calcostList")[0]
+    return int(
+        sum(float(res_obj.get(field, 0) or 0) for field in DISCOUNT_FIELDS)
+        + float(house_cost.get("housecalList")[0].get("disVlnCost", 0) or 0)
+        + float(house_cost.get("costUnder200", 0) or 0)
+    )
+
+# 요금 항목 센서: (키, 이름, 값 함수)
+COMPONENT_SENSORS = (
+    ("basic", "기본 요금", lambda res_obj: res_obj.get("costBasic", 0)),
+    ("energy", "전력량 요금", lambda res_obj: res_obj.get("costUse", 0)),
+    ("fuel", "연료비조정 요금", lambda res_obj: res_obj.get("costFuel", 0)),
+    ("climate", "기후환경 요금", lambda res_obj: res_obj.get("costClim", 0)),
+    ("discount", "할인 합계", total_discount),
+    ("electricity", "전기 요금", lambda res_obj: res_obj.get("costElecUse", 0)),
+    ("vat", "부가가치세", lambda res_obj: res_obj.get("costAddTax", 0)),
+    ("fund", "전력산업기반 기금", lambda res_obj: res_obj.get("costElecFund", 0)),
+)
+
+def usage_to_integer(state) -> int | None:
+    """사용량 엔티티 상태를 정수 kWh로 변환 (사용할 수 없으면 None)"""
+    if not state or state.state in ("unknown", "unavailable", "None", ""):
+        return None
     try:
-        this_month_meter_date = today.replace(day=meter_reading_day)
+        return int(float(state.state))
     except ValueError:
-        # 이번 달에 해당 날짜가 없는 경우 (예: 2월 30일 등)
-        last_day_this_month = (first_day_this_month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        this_month_meter_date = today.replace(day=min(meter_reading_day, last_day_this_month.day))
-
-    # 검침일이 오늘보다 미래라면 (이번 달 검침일 전이라면)
-    if today < this_month_meter_date:
-        # 전달 검침일 계산
-        last_day_last_month = first_day_this_month - timedelta(days=1)  # 전달 말일
-        start_date = last_day_last_month.replace(day=min(meter_reading_day,last_day_last_month.day)) + timedelta(days=offset)
-        end_date = this_month_meter_date - timedelta(days=1) + timedelta(days=offset) # 이번 달 검침일 하루 전
-    else:
-        # 다음 달 검침일 계산
-        first_day_next_month = (first_day_this_month + timedelta(days=32)).replace(day=1)
-        try:
-            next_month_meter_date = first_day_next_month.replace(day=meter_reading_day)
-        except ValueError:
-            # 다음 달에 해당 날짜가 없을 경우 (예: 2월 30일)
-            last_day_next_month = (first_day_next_month + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-            next_month_meter_date = last_day_next_month.replace(day=min(meter_reading_day, last_day_next_month.day))
-
-        start_date = this_month_meter_date + timedelta(days=offset) # 이번 달 검침일 + offset
-        end_date = next_month_meter_date - timedelta(days=1) + timedelta(days=offset)  # 다음 달 검침일 하루 전 + offset
+        return None
 
-    return start_date.strftime("%Y%m%d"), end_date.strftime("%Y%m%d")
+def build_payload(options, start_date: str, end_date: str, usage: int) -> dict:
+    """한전 요금계산 요청 데이터 생성"""
+    return {
+        "dma_reqParam": {
+            "chrgStYmd": start_date,
+            "chrgEndYmd": end_date,
+            "cntrClasCd": "100",
+            "lhvClcd": options.get("lhv_clcd", "1"),
+            "sekchrCd": "0",
+            "chrgAplyPwr": "3",
+            "dwelClcd": options.get("dwel_clcd", "1"),
+            "noho": "1",
+            "tpVarMrYn": "N",
+            "oneaPf": "0",
+            "cdnphPf": "0",
+            "nsla": "0",
+            "stliWattPwr": "0",
+            "whmeLloadUski": "0",
+            "whmeMloadUski": str(usage),
+            "whmeMaxLoadUski": "0",
+            "houseList": [
+                {
+                    "housSeqno": "1",
+                    "wlfrDcClcd1": options.get("wlfr_dc_clcd1", ""),
+                    "wlfrDcClcd2": options.get("wlfr_dc_clcd2", ""),
+                    "rowStatus": "R"
+                }
+            ]
+        }
+    }
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """센서 엔티티 설정"""
-    async_add_entities([KepcoElectricitySensor(config_entry)])
+    components = []
+    if config_entry.options.get("component_sensors", False):
+        components = [
+            KepcoBillComponentSensor(config_entry, key, name, value_fn)
+            for key, name, value_fn in COMPONENT_SENSORS
+        ]
+    companions = list(components)
+    tier_sensor = None
+    if config_entry.options.get("marginal_price_sensor", False):
+        tier_sensor = KepcoMarginalPriceSensor(config_entry)
+        companions.append(tier_sensor)
+    if config_entry.options.get("diagnostic_sensors", False):
+        metrics = hass.data[DOMAIN][DATA_METRICS]
+        companions += [
+            KepcoDiagnosticSensor(config_entry, metrics, key, name, unit, state_class, value_fn)
+            for key, name, unit, state_class, value_fn in DIAGNOSTIC_SENSORS
+        ]
+    async_add_entities([KepcoElectricitySensor(config_entry, components, tier_sensor, companions), *companions])
+
+CALC_MODE_LABELS = {CALC_MODE_REMOTE: "한전 API", CALC_MODE_OFFLINE: "한전 API 우선"}
+
+# 바뀌면 엔티티 구성이 달라져 다시 불러와야 하는 옵션
+RELOAD_OPTIONS = frozenset({"component_sensors", "marginal_price_sensor", "diagnostic_sensors"})
+# 검침 기간을 다시 계산해야 하는 옵션
+PERIOD_OPTIONS = frozenset({"meter_reading_day", "meter_reading_day_offset"})
+# 요금 조건 옵션
+TARIFF_OPTIONS = frozenset({"lhv_clcd", "dwel_clcd", "wlfr_dc_clcd1", "wlfr_dc_clcd2"})
+# 요금을 다시 계산해야 하는 옵션
+RECALCULATE_OPTIONS = PERIOD_OPTIONS | TARIFF_OPTIONS | {"usage_entity", "calculation_mode"}
 
 class KepcoElectricitySensor(SensorEntity, RestoreEntity):
     """한국전력 전기요금 계산 센서"""
@@ -59,13 +167,45 @@ class KepcoElectricitySensor(SensorEntity, RestoreEntity):
     _attr_device_class = SensorDeviceClass.MONETARY
     _attr_state_class = SensorStateClass.TOTAL
     _attr_native_unit_of_measurement = "KRW"
+    _attr_should_poll = False  # 사용량 엔티티 상태 변경 시에만 업데이트
+    # 설정값 속성은 레코더에 저장하지 않음
+    _unrecorded_attributes = frozenset({
+        "계약종별 선택",
+        "주거구분 선택",
+        "복지할인 선택",
+        "대가족요금/생명유지장치 선택",
+        "검침일",
+        "검침일 오프셋",
+        "계산 방식",
+    })
 
-    def __init__(self, config_entry):
+    def __init__(self, config_entry, component_sensors=(), tier_sensor=None, companions=()):
         self._config_entry = config_entry
+        self._options = dict(config_entry.options)  # 마지막으로 적용한 옵션
+        self._component_sensors = component_sensors  # 요금 항목 센서 (사용 시)
+        self._tier_sensor = tier_sensor  # 한계 요금/누진 구간 센서 (사용 시)
+        self._companions = companions  # 같은 엔트리의 보조 센서 전체 (이름 변경 반영용)
         self._attr_name = config_entry.options.get("sensor_name", "Kepco Bill")  # 사용자가 입력한 센서 이름 적용
         self._attr_unique_id = config_entry.entry_id
         self._attributes = {}
         self._last_integer_usage = None  # 마지막 정수 값 저장
+        self._last_api_check = None  # 마지막 한전 API 검증 시각
+        self._api_drift = None  # 로컬 계산과 한전 API 결과의 차이 (원)
+        self._bill_table = None  # 현재 검침 기간의 사용량별 요금표
+        self._debouncer = None
+        self._last_update_ok = False  # 마지막 계산 성공 여부
+        self._failures = 0  # 연속 계산 실패 횟수
+        self._cancel_retry = None  # 예약된 재시도 취소 함수
+        self._refreshing = False  # 계산 진행 중 여부
+        self._generation = 0  # 옵션/검침 기간 세대 (바뀌면 진행 중인 계산 결과를 버림)
+        self._refresh_requested = False  # 계산 중 들어온 재계산 요청
+        self._cancel_follow_up = None  # 계산이 끝난 뒤 예약한 재계산 취소 함수
+        self._forecast = None  # 사용 패턴 기반 사용량 예측 모델
+        self._forecast_task = None  # 진행 중인 사용량 예측 작업
+        self._forecast_attributes = {}  # 마지막 사용량 예측 결과 (다음 요금 갱신에도 유지)
+        self._calendar = None  # 검침 기간
+        self._offline_estimate = False  # 마지막 요금이 오프라인 추정인지 여부
+        self._unsub_usage = None  # 사용량 엔티티 상태 변경 구독 해제 함수
 
     @property
     def extra_state_attributes(self):
@@ -81,8 +221,7 @@ class KepcoElectricitySensor(SensorEntity, RestoreEntity):
                 _LOGGER.warning("이전 상태가 비정상적임: %s → 상태 및 속성 복원 안함", last_state.state)
                 self._attr_native_value = None  # 상태를 직접 설정하지 않음
                 self._attributes = {}  # 속성도 초기화 (업데이트를 강제 실행하기 위해)
-                self._last_integer_usage = None
-                await self.async_update()  # ✅ 강제 업데이트 실행
+                self._last_integer_usage = None  # HA 시작 완료 후 첫 계산에서 다시 계산
             else:
                 # ✅ 정상적인 경우만 상태 & 속성 복원
                 self._attr_native_value = last_state.state
@@ -93,9 +232,191 @@ class KepcoElectricitySensor(SensorEntity, RestoreEntity):
     
                 # ✅ 정상 복원된 경우, GUI에 즉시 반영
                 self.async_write_ha_state()
-            
+
+        # 검침 기간 및 기간 전환 타이머
+        self._async_start_calendar()
+        self.async_on_remove(lambda: self._calendar.async_stop())
+
+        # 공용 조정자에 등록 (전체 갱신 서비스 대상)
+        coordinator = self.hass.data[DOMAIN][DATA_COORDINATOR]
+        coordinator.entities[self._config_entry.entry_id] = self
+        self.async_on_remove(lambda: coordinator.entities.pop(self._config_entry.entry_id, None))
+
+        # 사용량 엔티티 상태 변경 구독 (짧은 시간 내 연속 변경은 한 번으로 묶음)
+        self._debouncer = Debouncer(
+            self.hass,
+            _LOGGER,
+            cooldown=USAGE_DEBOUNCE_SECONDS,
+            immediate=True,
+            function=self._async_refresh,
+        )
+        self.async_on_remove(self._debouncer.async_shutdown)
+        self.async_on_remove(self._async_cancel_retry)
+        self.async_on_remove(self._async_cancel_follow_up)
+        self.async_on_remove(self._async_cancel_forecast)
+        self._async_track_usage()
+        self.async_on_remove(lambda: self._unsub_usage())
+        # 재시작 중 바뀌었을 수 있는 사용량 확인 (HA 시작을 지연시키지 않도록 시작 완료 후 백그라운드에서 실행)
+        self.async_on_remove(async_at_started(self.hass, self._async_initial_refresh))
+
+    @callback
+    def _async_start_calendar(self) -> None:
+        options = self._config_entry.options
+        if self._calendar is not None:
+            self._calendar.async_stop()
+        self._calendar = BillingCalendar(
+            self.hass, options.get("meter_reading_day", 25), options.get("meter_reading_day_offset", 0)
+        )
+        self._calendar.async_start(self._async_period_rollover)
+
+    @callback
+    def _async_track_usage(self) -> None:
+        if self._unsub_usage is not None:
+            self._unsub_usage()
+        self._unsub_usage = async_track_state_change_event(
+            self.hass,
+            [self._config_entry.options.get("usage_entity")],
+            self._async_usage_changed,
+        )
+
+    @callback
+    def async_apply_options(self, options) -> bool:
+        """바뀐 옵션만 바로 적용 (엔티티 구성이 바뀌어 다시 불러와야 하면 False)"""
+        changed = {key for key in {*self._options, *options} if self._options.get(key) != options.get(key)}
+        if any(bool(self._options.get(key)) != bool(options.get(key)) for key in RELOAD_OPTIONS):
+            return False
+        self._options = dict(options)
+        if not changed:
+            return True
+        _LOGGER.debug("옵션 변경 바로 적용: %s", sorted(changed))
+
+        if "sensor_name" in changed:
+            name = options.get("sensor_name", "Kepco Bill")
+            self._attr_name = name
+            for companion in self._companions:
+                companion.async_set_name(name)
+        if "usage_entity" in changed:
+            self._async_track_usage()
+        if changed & PERIOD_OPTIONS:
+            self._async_start_calendar()
+        if changed & TARIFF_OPTIONS:
+            # 응답 캐시는 요금 옵션별로 저장되므로 이 센서의 요금표만 버림
+            self._bill_table = None
+            # 이전 요금 조건의 한전 API 검증 결과를 버리고 다음 계산에서 다시 검증
+            self._api_drift = None
+            self._last_api_check = None
+            self._attributes.pop("한전 API 요금 차이", None)
+
+        if changed & RECALCULATE_OPTIONS:
+            self._generation += 1
+            self._last_integer_usage = None
+            self._async_cancel_retry()
+            self._async_request_refresh()
+        else:
+            self.async_write_ha_state()
+        return True
+
+    @callback
+    def _async_initial_refresh(self, _hass) -> None:
+        """첫 계산 (로컬 계산/캐시는 즉시, 한전 API 호출은 공용 대기열에서 순차 처리)"""
+        self.hass.async_create_background_task(
+            self._debouncer.async_call(),
+            f"kepco_electricity initial refresh {self._config_entry.entry_id}",
+        )
+
+    @callback
+    def _async_usage_changed(self, event: Event) -> None:
+        """정수 kWh가 바뀐 경우에만 재계산 예약"""
+        usage = usage_to_integer(event.data.get("new_state"))
+        if usage is None or usage == self._last_integer_usage:
+            return
+        self._async_request_refresh()
+
+    @callback
+    def _async_request_refresh(self) -> None:
+        """재계산 예약 (계산 중이면 계산이 끝난 뒤 예약)"""
+        if self._refreshing:
+            self._refresh_requested = True
+            return
+        self._debouncer.async_schedule_call()
+
+    @callback
+    def _async_period_rollover(self, period) -> None:
+        """검침 기간이 바뀌면 사용량 추적과 요금표를 초기화하고 새 기간으로 다시 계산"""
+        _LOGGER.debug("새 검침 기간 요금 계산: %s ~ %s", period.bill_start, period.bill_end)
+        self._last_integer_usage = None
+        self._bill_table = None
+        self._forecast_attributes = {}
+        self._generation += 1
+        self.hass.data[DOMAIN][DATA_CACHE].purge_expired()
+        self._async_request_refresh()
+
+    async def _async_refresh(self) -> None:
+        self._refreshing = True
+        try:
+            await self.async_update()
+            self.async_write_ha_state()
+        finally:
+            self._refreshing = False
+        # 계산 중 들어온 요청이나 바뀐 사용량은 다시 계산 (실패 시에는 재시도 타이머가 처리)
+        requested, self._refresh_requested = self._refresh_requested, False
+        if self._cancel_retry is None:
+            usage = usage_to_integer(self.hass.states.get(self._config_entry.options.get("usage_entity")))
+            if requested or (usage is not None and usage != self._last_integer_usage):
+                self._async_schedule_follow_up()
+
+    @callback
+    def _async_schedule_follow_up(self) -> None:
+        """계산이 끝난 뒤 재계산 예약
+
+        이 함수는 디바운서 잠금 안에서 실행되고, 잠금 중 들어온 호출은 디바운서가 버리므로
+        재계산 대기 시간이 지난 뒤 예약합니다. 그때 다른 계산이 진행 중이면 그 계산이 끝날 때 다시 확인합니다.
+        """
+        if self._cancel_follow_up is not None:
+            return
+        self._cancel_follow_up = async_call_later(self.hass, USAGE_DEBOUNCE_SECONDS, self._async_follow_up)
+
+    @callback
+    def _async_follow_up(self, _now) -> None:
+        self._cancel_follow_up = None
+        self._async_request_refresh()
+
+    @callback
+    def _async_cancel_follow_up(self) -> None:
+        if self._cancel_follow_up:
+            self._cancel_follow_up()
+            self._cancel_follow_up = None
+
+    @callback
+    def _async_cancel_retry(self) -> None:
+        if self._cancel_retry:
+            self._cancel_retry()
+            self._cancel_retry = None
+
+    @callback
+    def _async_schedule_retry(self) -> None:
+        """실패한 계산 재시도 예약 (엔트리당 하나, 재시도 시 최신 사용량으로 계산)"""
+        self._async_cancel_retry()
+        self._failures += 1
+        delay = backoff_delay(self._failures - 1, RETRY_BASE_SECONDS, RETRY_MAX_SECONDS)
+        delay = max(delay, self.hass.data[DOMAIN][DATA_API].breaker.retry_in)
+        _LOGGER.debug("요금 계산 실패 %s회, %.0f초 후 재시도", self._failures, delay)
+        self._cancel_retry = async_call_later(self.hass, delay, self._async_retry)
+
+    async def _async_retry(self, _now) -> None:
+        self._cancel_retry = None
+        await self._debouncer.async_call()
+
+    async def async_force_refresh(self) -> bool:
+        """사용량 변경 여부와 관계없이 다시 계산 (성공 여부 반환)"""
+        self._last_integer_usage = None
+        self._last_update_ok = False
+        await self._async_refresh()
+        return self._last_update_ok
+
     async def async_update(self, _=None):
         """API 호출 및 상태 업데이트"""
+        generation = self._generation
         try:
             options = self._config_entry.options
             
@@ -105,71 +426,55 @@ class KepcoElectricitySensor(SensorEntity, RestoreEntity):
 
             # 사용량 조회
             state = self.hass.states.get(usage_entity)
-            if not state or state.state in ("unknown", "unavailable", "None", ""):
+            usage = usage_to_integer(state)
+            if usage is None:
                 _LOGGER.debug("사용량 엔티티 상태가 없어 업데이트를 건너뜁니다: %s", getattr(state, 'state', None))
                 return
-            usage = int(float(state.state))
-            
+            metrics = self.hass.data[DOMAIN][DATA_METRICS]
+            entry_id = self._config_entry.entry_id
+            metrics.increment(REQUESTED, entry_id)
+
             # 정수 부분이 변경되었는지 확인
             if self._last_integer_usage is not None and self._last_integer_usage == usage:
                 _LOGGER.debug("정수 값 변경 없음, 업데이트 건너뜀.")
+                metrics.increment(SKIPPED_UNCHANGED, entry_id)
                 return
-                
-            self._last_integer_usage = usage
 
-            # 날짜 계산
-            start_date, end_date = calculate_billing_period(int(reading_day),int(offset))
-            
+            # 사용량 변화가 클수록 한전 API 대기열에서 먼저 처리
+            priority = -abs(usage - int(self._last_integer_usage or 0))
+
+            # 검침 기간 (미리 계산된 현재 기간)
+            period = self._calendar.current
+            start_date, end_date = period.bill_start_ymd, period.bill_end_ymd
+
             # 월사용량 예측
-            now = datetime.now()
-            start_date_no_offset_str, end_date_no_offset_str = calculate_billing_period(int(reading_day),0)
-            start_date_no_offset = datetime.strptime(start_date_no_offset_str, "%Y%m%d")
-            end_date_no_offset = datetime.strptime(end_date_no_offset_str, "%Y%m%d") 
-            total_days = (end_date_no_offset - start_date_no_offset).days + 1
-            total_seconds = total_days * 86400
-            elapsed_seconds_today = now.hour * 3600 + now.minute * 60 + now.second
-            elapsed_seconds = ((now.date() - start_date_no_offset.date()).days * 86400) + elapsed_seconds_today
-            elapsed_ratio = elapsed_seconds / total_seconds
+            now = dt_util.now()
+            elapsed_ratio = period.elapsed_ratio(now)
+            elapsed_seconds = (now - period.start_time).total_seconds()
             predicted_usage = int((usage / elapsed_ratio)) if elapsed_ratio > 0 else usage
 
             # API 요청 데이터
-            payload = {
-                "dma_reqParam": {
-                    "chrgStYmd": start_date,
-                    "chrgEndYmd": end_date,
-                    "cntrClasCd": "100",
-                    "lhvClcd": options.get("lhv_clcd", "1"),
-                    "sekchrCd": "0",
-                    "chrgAplyPwr": "3",
-                    "dwelClcd": options.get("dwel_clcd", "1"),
-                    "noho": "1",
-                    "tpVarMrYn": "N",
-                    "oneaPf": "0",
-                    "cdnphPf": "0",
-                    "nsla": "0",
-                    "stliWattPwr": "0",
-                    "whmeLloadUski": "0",
-                    "whmeMloadUski": str(usage),
-                    "whmeMaxLoadUski": "0",
-                    "houseList": [
-                        {
-                            "housSeqno": "1",
-                            "wlfrDcClcd1": options.get("wlfr_dc_clcd1", ""),
-                            "wlfrDcClcd2": options.get("wlfr_dc_clcd2", ""),
-                            "rowStatus": "R"
-                        }
-                    ]
-                }
-            }
+            payload = build_payload(options, start_date, end_date, usage)
 
-            # API 호출
-            response = await self._async_fetch_data(payload)
-            _LOGGER.debug("API 호출")
-            if not response or "dma_resObj" not in response:
+            res_obj = await self._async_calculate(options, payload, priority, period.end_ymd)
+            if generation != self._generation:
+                # 계산 중 옵션/검침 기간이 바뀌면 이전 조건의 결과는 버림 (새 조건으로 다시 계산 예약됨)
+                _LOGGER.debug("계산 중 요금 조건이 바뀌어 결과를 버립니다.")
+                return
+            if not res_obj:
+                # 계산 실패 시 마지막 요금을 유지하고 재시도 예약
+                self._last_update_ok = False
+                metrics.increment(FAILED, entry_id)
+                if self._attributes:
+                    self._attributes["이전 요금 표시 중"] = True
+                self._async_schedule_retry()
                 return
 
-            res_obj = response["dma_resObj"]
-                
+            # 계산에 성공한 사용량만 기록 (실패한 사용량은 재시도 시 다시 계산)
+            self._last_integer_usage = usage
+            self._failures = 0
+            self._async_cancel_retry()
+
             contract_types = {"1": "주택용(저압)", "2": "주택용(고압)"}
             dwelling_types = {"1": "주거용", "2": "비주거용"}
             welfare_discounts = {
@@ -227,28 +532,316 @@ class KepcoElectricitySensor(SensorEntity, RestoreEntity):
                 "국가유공자 할인": res_obj.get("costDisNat", 0),
                 "요금동결 할인": res_obj.get("calcostList")[0].get("housecalList")[0].get("disVlnCost",0),
                 "200kWh 이하 할인": res_obj.get("calcostList")[0].get("costUnder200"),
-                "총 청구금액": res_obj.get("costTotCharge", 0)
+                "총 청구금액": res_obj.get("costTotCharge", 0),
+                "계산 방식": CALC_MODE_LABELS.get(options.get("calculation_mode", DEFAULT_CALC_MODE), "로컬"),
             }
+            if self._offline_estimate:
+                self._attributes["오프라인 추정"] = True
+            self._attributes.update(self._forecast_attributes)
+            if self._api_drift is not None:
+                self._attributes["한전 API 요금 차이"] = self._api_drift
+            if self._component_sensors:
+                # 요금 항목은 개별 센서로 기록
+                for key in COST_ATTRIBUTES:
+                    self._attributes.pop(key, None)
+                for component in self._component_sensors:
+                    component.async_set_bill(res_obj)
+            if self._tier_sensor is not None:
+                await self._async_update_tier(
+                    options, payload["dma_reqParam"], usage, elapsed_seconds, period.end_time
+                )
+            self._last_update_ok = True
+            # 사용 패턴 기반 예측은 요금을 먼저 기록한 뒤 백그라운드에서 (학습 데이터가 부족하면 선형 예측 유지)
+            self._async_schedule_forecast(options, payload["dma_reqParam"], usage, period.end_time)
 
         except Exception as e:
+            # 계산 실패와 같이 마지막 요금을 유지하고 재시도 예약
             _LOGGER.error("요금 계산 오류: %s", e, exc_info=True)
+            self._last_update_ok = False
+            self.hass.data[DOMAIN][DATA_METRICS].increment(FAILED, self._config_entry.entry_id)
+            if self._attributes:
+                self._attributes["이전 요금 표시 중"] = True
+            self._async_schedule_retry()
+
+    async def _async_calculate(self, options, payload, priority=0, expires=None):
+        """요금 계산 (로컬 엔진 우선, 한전 API는 주기적 검증용)"""
+        mode = options.get("calculation_mode", DEFAULT_CALC_MODE)
+        self._offline_estimate = False
+        if mode == CALC_MODE_REMOTE:
+            return await self._async_fetch_cached(payload, priority, expires)
+        if mode == CALC_MODE_OFFLINE:
+            return await self._async_calculate_offline(payload, priority, expires)
+
+        req_param = payload["dma_reqParam"]
+        table = await self._async_get_bill_table(req_param, options)
+        res_obj = table.lookup(int(req_param["whmeMloadUski"]))
+        if res_obj is None:
+            res_obj = calculate_bill(req_param)
+        self.hass.data[DOMAIN][DATA_METRICS].increment(SERVED_LOCAL, self._config_entry.entry_id)
+
+        check_hours = int(options.get("api_check_interval", DEFAULT_API_CHECK_INTERVAL))
+        now = datetime.now()
+        if check_hours > 0 and (
+            self._last_api_check is None or now - self._last_api_check >= timedelta(hours=check_hours)
+        ):
+            self._last_api_check = now
+            # 검증 호출은 요금 갱신을 막지 않도록 백그라운드에서 처리
+            self.hass.async_create_background_task(
+                self._async_cross_check(payload, res_obj["costTotCharge"], expires),
+                f"kepco_electricity cross-check {self._config_entry.entry_id}",
+            )
+
+        return res_obj
+
+    async def _async_calculate_offline(self, payload, priority=0, expires=None):
+        """한전 API 우선 계산 (연결할 수 없으면 기록된 응답/로컬 엔진으로 추정하고 나중에 확인)"""
+        replay = self.hass.data[DOMAIN][DATA_REPLAY]
+        entry_id = self._config_entry.entry_id
+        if not self.hass.data[DOMAIN][DATA_API].breaker.is_open:
+            try:
+                res_obj = await self._async_fetch_cached(payload, priority, expires)
+            except Exception as e:
+                _LOGGER.debug("한전 API 요금 계산 실패: %s", e)
+                res_obj = None
+            if res_obj:
+                replay.record(payload, res_obj, entry_id, expires)
+                return res_obj
+        _LOGGER.debug("한전 API에 연결할 수 없어 요금 추정")
+        self._offline_estimate = True
+        self.hass.data[DOMAIN][DATA_METRICS].increment(SERVED_OFFLINE, entry_id)
+        return replay.estimate(payload, entry_id, expires)
+
+    @callback
+    def _async_schedule_forecast(self, options, req_param, usage, period_end) -> None:
+        self._forecast_task = self.hass.async_create_background_task(
+            self._async_update_forecast(options, req_param, usage, period_end),
+            f"kepco_electricity forecast {self._config_entry.entry_id}",
+        )
 
-    async def _async_fetch_data(self, payload):
-        """API 호출 함수"""
+    @callback
+    def _async_cancel_forecast(self) -> None:
+        if self._forecast_task is not None:
+            self._forecast_task.cancel()
+            self._forecast_task = None
+
+    async def _async_update_forecast(self, options, req_param, usage, period_end) -> None:
+        """예측이 끝나면 예측 속성만 갱신 (그사이 다른 사용량으로 계산했으면 버림)"""
         try:
-            headers = {
-                "Content-Type": "application/json",
-                "User-Agent": "Mozilla/5.0"
-            }
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    "https://online.kepco.co.kr/pr/calcul/calcul",
-                    json=payload,
-                    headers=headers
-                ) as response:
-                    if response.status != 200:
-                        return None
-                    return await response.json()
+            forecast = await self._async_forecast(options, req_param, usage, period_end)
         except Exception as e:
-            _LOGGER.error("API 호출 실패: %s", e)
-            return None
+            _LOGGER.debug("사용량 예측 실패: %s", e)
+            return
+        if usage != self._last_integer_usage:
+            return
+        self._forecast_attributes = forecast
+        if forecast and self._attributes:
+            self._attributes.update(forecast)
+            self.async_write_ha_state()
+
+    async def _async_forecast(self, options, req_param, usage, period_end):
+        """요일·시간대별 사용 패턴으로 기간 종료 시점 사용량/요금 예측"""
+        usage_entity = options.get("usage_entity")
+        if self._forecast is None or self._forecast.entity_id != usage_entity:
+            self._forecast = UsageForecast(usage_entity)
+        await self._forecast.async_refit(self.hass)
+
+        prediction = self._forecast.predict(usage, dt_util.utcnow(), dt_util.as_utc(period_end))
+        if prediction is None:
+            return {}
+
+        # 로컬 계산 방식에서만 요금표 사용 (다른 방식은 요금표를 만들지 않고 로컬 엔진으로 계산)
+        table = None
+        if options.get("calculation_mode", DEFAULT_CALC_MODE) == CALC_MODE_LOCAL:
+            table = await self._async_get_bill_table(req_param, options)
+
+        def _bill(predicted):
+            predicted = int(round(predicted))
+            total = table.total(predicted) if table is not None else None
+            if total is None:
+                total = calculate_bill({**req_param, "whmeMloadUski": str(predicted)})["costTotCharge"]
+            return total
+
+        expected, low, high = prediction
+        return {
+            "예상사용량": int(round(expected)),
+            "예상사용량 하한": int(round(low)),
+            "예상사용량 상한": int(round(high)),
+            "예상 요금": _bill(expected),
+            "예상 요금 하한": _bill(low),
+            "예상 요금 상한": _bill(high),
+        }
+
+    async def _async_update_tier(self, options, req_param, usage, elapsed_seconds, period_end):
+        """요금표로 한계 요금과 다음 누진 구간까지 남은 사용량/진입 예상 시각 계산 (한전 API 호출 없음)"""
+        table = await self._async_get_bill_table(req_param, options)
+        tier, _, upper = table.tier(usage)
+        remaining = upper - usage if upper is not None else None
+        crossing = None
+        if remaining is not None:
+            now = dt_util.utcnow()
+            end = dt_util.as_utc(period_end)
+            if self._forecast is not None and self._forecast.ready:
+                crossing = self._forecast.crossing_time(usage, upper, now, end)
+            elif usage > 0 and elapsed_seconds > 0:
+                # 학습 데이터가 부족하면 이번 기간 평균 사용 속도로 추정
+                crossing = now + timedelta(seconds=remaining * elapsed_seconds / usage)
+                if crossing >= end:
+                    crossing = None
+        self._tier_sensor.async_set_tier(table.marginal_price(usage), tier, upper, remaining, crossing)
+
+    async def _async_cross_check(self, payload, local_total, expires=None):
+        """로컬 계산 결과를 한전 API 결과와 비교"""
+        # 검증 호출은 실제 요금 계산보다 나중에 처리
+        remote = await self._async_fetch_cached(payload, priority=1, expires=expires)
+        if not remote:
+            return
+        remote_total = remote.get("costTotCharge", 0)
+        self._api_drift = int(float(remote_total)) - local_total
+        if self._api_drift:
+            _LOGGER.warning(
+                "로컬 요금 계산이 한전 API와 다릅니다 (로컬: %s, 한전: %s). 요금표 갱신이 필요할 수 있습니다.",
+                local_total, remote_total,
+            )
+        if self._attributes:
+            self._attributes["한전 API 요금 차이"] = self._api_drift
+            self.async_write_ha_state()
+
+    async def _async_get_bill_table(self, req_param, options):
+        """검침 기간/요금 옵션이 바뀐 경우에만 요금표 재생성"""
+        period = period_for(req_param)
+        max_usage = int(options.get("table_max_usage", DEFAULT_TABLE_MAX_USAGE))
+        table = self._bill_table
+        if table is None or table.key != period.key or table.max_usage != max_usage:
+            # 같은 조건의 요금표는 모든 센서가 공유 (동시에 요청해도 한 번만 생성)
+            builds = self.hass.data[DOMAIN][DATA_TABLE_BUILDS]
+            key = (period.key, max_usage)
+            future = builds.get(key)
+            if future is None:
+                future = self.hass.async_add_executor_job(bill_table, period, max_usage)
+                builds[key] = future
+                future.add_done_callback(lambda _: builds.pop(key, None))
+            table = await asyncio.shield(future)
+            self._bill_table = table
+            _LOGGER.debug("요금표 조회: %s ~ %s, 0 ~ %s kWh", period.start, period.end, max_usage)
+        return table
+
+    async def _async_fetch_cached(self, payload, priority=0, expires=None):
+        """공용 조정자를 통해 한전 API 결과 조회 (캐시/동일 요청 공유, expires 는 캐시 만료일)"""
+        return await self.hass.data[DOMAIN][DATA_COORDINATOR].async_calculate(
+            payload, priority, self._config_entry.entry_id, expires
+        )
+
+
+class KepcoBillComponentSensor(RestoreSensor):
+    """요금 항목 센서 (요금 센서가 계산할 때 함께 갱신)"""
+
+    _attr_icon = "mdi:cash-multiple"
+    _attr_device_class = SensorDeviceClass.MONETARY
+    _attr_state_class = SensorStateClass.TOTAL
+    _attr_native_unit_of_measurement = "KRW"
+    _attr_should_poll = False
+
+    def __init__(self, config_entry, key, name, value_fn):
+        self._value_fn = value_fn
+        self._label = name
+        self._attr_name = f"{config_entry.options.get('sensor_name', 'Kepco Bill')} {name}"
+        self._attr_unique_id = f"{config_entry.entry_id}_{key}"
+
+    async def async_added_to_hass(self):
+        last_data = await self.async_get_last_sensor_data()
+        if last_data is not None:
+            self._attr_native_value = last_data.native_value
+
+    @callback
+    def async_set_name(self, sensor_name) -> None:
+        self._attr_name = f"{sensor_name} {self._label}"
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    @callback
+    def async_set_bill(self, res_obj) -> None:
+        self._attr_native_value = self._value_fn(res_obj)
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+
+class KepcoMarginalPriceSensor(RestoreSensor):
+    """한계 요금/누진 구간 센서 (요금 센서가 계산할 때 요금표로 함께 갱신)"""
+
+    _attr_icon = "mdi:stairs-up"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = "KRW/kWh"
+    _attr_should_poll = False
+
+    def __init__(self, config_entry):
+        self._label = "한계 요금"
+        self._attr_name = f"{config_entry.options.get('sensor_name', 'Kepco Bill')} {self._label}"
+        self._attr_unique_id = f"{config_entry.entry_id}_marginal_price"
+        self._attr_extra_state_attributes = {}
+
+    async def async_added_to_hass(self):
+        last_data = await self.async_get_last_sensor_data()
+        if last_data is not None:
+            self._attr_native_value = last_data.native_value
+        last_state = await self.async_get_last_state()
+        if last_state is not None:
+            self._attr_extra_state_attributes = dict(last_state.attributes)
+
+    @callback
+    def async_set_name(self, sensor_name) -> None:
+        self._attr_name = f"{sensor_name} {self._label}"
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    @callback
+    def async_set_tier(self, price, tier, upper, remaining, crossing) -> None:
+        self._attr_native_value = price
+        self._attr_extra_state_attributes = {
+            "요금 구간": tier,
+            "구간 상한": upper,
+            "다음 구간까지 남은 사용량": remaining,
+            "다음 구간 진입 예상 시각": crossing.isoformat() if crossing else None,
+        }
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+
+def _api_latency_ms(metrics, entry_id):
+    mean = metrics.latency.mean
+    return round(mean * 1000, 1) if mean is not None else None
+
+# 진단 센서: (키, 이름, 단위, 상태 클래스, 값 함수)
+DIAGNOSTIC_SENSORS = (
+    ("api_calls", "한전 API 호출 수", None, SensorStateClass.TOTAL_INCREASING,
+     lambda metrics, entry_id: metrics.get(SENT_TO_KEPCO, entry_id)),
+    ("failures", "요금 계산 실패 수", None, SensorStateClass.TOTAL_INCREASING,
+     lambda metrics, entry_id: metrics.get(FAILED, entry_id)),
+    ("cache_hit_rate", "캐시 적중률", "%", SensorStateClass.MEASUREMENT,
+     lambda metrics, entry_id: metrics.cache_hit_rate(entry_id)),
+    ("api_latency", "한전 API 평균 응답 시간", "ms", SensorStateClass.MEASUREMENT, _api_latency_ms),
+)
+
+class KepcoDiagnosticSensor(SensorEntity):
+    """요금 계산 통계 진단 센서"""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_icon = "mdi:chart-box-outline"
+
+    def __init__(self, config_entry, metrics, key, name, unit, state_class, value_fn):
+        self._config_entry = config_entry
+        self._metrics = metrics
+        self._value_fn = value_fn
+        self._label = name
+        self._attr_name = f"{config_entry.options.get('sensor_name', 'Kepco Bill')} {name}"
+        self._attr_unique_id = f"{config_entry.entry_id}_{key}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = state_class
+
+    @callback
+    def async_set_name(self, sensor_name) -> None:
+        self._attr_name = f"{sensor_name} {self._label}"
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    async def async_update(self):
+        self._attr_native_value = self._value_fn(self._metrics, self._config_entry.entry_id)
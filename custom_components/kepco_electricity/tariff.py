@@ -0,0 +1,356 @@
+"""주택용 전기요금 로컬 계산 엔진
+
+한전ON 요금계산기(`/pr/calcul/calcul`)와 같은 요청 파라미터(`dma_reqParam`)를 받아
+같은 형태의 결과(`dma_resObj`)를 돌려줍니다. 요금표가 바뀌면 아래 상수만 갱신하면 됩니다.
+"""
+from __future__ import annotations
+
+import math
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from datetime import date, datetime, timedelta
+
+# 주택용 전력 요금표 (lhvClcd "1": 저압, "2": 고압)
+BASIC_CHARGE = {
+    "1": (910, 1600, 7300),
+    "2": (730, 1260, 6060),
+}
+ENERGY_RATE = {
+    "1": (120.0, 214.6, 307.3),
+    "2": (105.0, 174.0, 242.3),
+}
+SUPER_USER_RATE = {"1": 736.2, "2": 601.3}  # 하계/동계 1,000kWh 초과분
+
+# 누진 구간 상한 (kWh)
+TIER_LIMITS_SUMMER = (300, 450)
+TIER_LIMITS_OTHER = (200, 400)
+SUPER_USER_LIMIT = 1000
+SUMMER_MONTHS = (7, 8)
+WINTER_MONTHS = (12, 1, 2)
+
+CLIMATE_RATE = 9.0  # 기후환경요금 (원/kWh)
+FUEL_RATE = 5.0  # 연료비조정요금 (원/kWh)
+VAT_RATE = 0.1
+FUND_RATE = 0.032  # 전력산업기반기금
+
+# 200kWh 이하 필수사용량 보장공제 (복지할인 가구만 적용)
+UNDER_200_LIMIT = 200
+UNDER_200_DEDUCTION = {"1": 4000, "2": 2500}
+MINIMUM_CHARGE = 1000
+
+# 복지할인: 코드 → (결과 필드, 월 할인한도(기타), 월 할인한도(하계), 할인율)
+WELFARE_DISCOUNTS = {
+    "01": ("costDisDef", 16000, 20000, None),
+    "02": ("costDisNat", 16000, 20000, None),
+    "03": ("costDisNat", 16000, 20000, None),
+    "04": ("costDisIncLiv", 16000, 20000, None),
+    "05": ("costDisWelf", None, None, 0.3),
+    "07": ("costDisSuplife", 8000, 10000, None),
+    "09": ("costDisLiv", 10000, 12000, None),
+}
+# 대가족/생명유지장치/출산가구: 전기요금의 30%, 월 한도 (None 이면 한도 없음)
+FAMILY_DISCOUNTS = {
+    "21": ("costDisLarge", 16000, 20000),
+    "22": ("costDisMchild", 16000, 20000),
+    "23": ("costDisLarge", None, None),
+    "24": ("costDisBirth", 16000, 20000),
+}
+FAMILY_DISCOUNT_RATE = 0.3
+
+MARGINAL_MIN_SPAN = 20  # 한계 요금 계산에 쓰는 최소 사용량 구간 (kWh, 원 단위 절사 오차 완화)
+MARGINAL_LAST_SPAN = 100  # 마지막 누진 구간의 한계 요금 계산 구간 (kWh)
+
+DISCOUNT_FIELDS = (
+    "costDisWelf",
+    "costDisMchild",
+    "costDisBirth",
+    "costDisLarge",
+    "costDisInd",
+    "costDisIncEdu",
+    "costDisIncLiv",
+    "costDisLiv",
+    "costDisSuplife",
+    "costDisDef",
+    "costDisNat",
+)
+RESULT_FIELDS = (
+    "costBasic",
+    "costUse",
+    "costFuel",
+    "costClim",
+    "costElecUse",
+    "costAddTax",
+    "costElecFund",
+    *DISCOUNT_FIELDS,
+    "costTotCharge",
+)
+
+
+def _parse_ymd(value) -> date:
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value), "%Y%m%d").date()
+
+
+def billing_segments(start: date, end: date) -> list[tuple[int, int]]:
+    """검침 기간을 월별로 나눠 (월, 일수) 목록으로 반환"""
+    segments = []
+    current = start
+    while current <= end:
+        next_month = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+        segment_end = min(end, next_month - timedelta(days=1))
+        segments.append((current.month, (segment_end - current).days + 1))
+        current = segment_end + timedelta(days=1)
+    return segments
+
+
+def _tier_charges(usage: float, limits: tuple, rates: tuple, super_rate: float | None, super_limit: float) -> float:
+    """누진 구간별 전력량 요금 (일할 적용 전 사용량 기준)"""
+    charge = 0.0
+    lower = 0.0
+    bounds = (*limits, super_limit if super_rate is not None else math.inf, math.inf)
+    tier_rates = (*rates, super_rate if super_rate is not None else rates[-1])
+    for upper, rate in zip(bounds, tier_rates):
+        if usage <= lower:
+            break
+        charge += (min(usage, upper) - lower) * rate
+        lower = upper
+    return charge
+
+
+def _tier_index(usage: float, limits: tuple) -> int:
+    for index, limit in enumerate(limits):
+        if usage <= limit:
+            return index
+    return len(limits)
+
+
+class TariffPeriod:
+    """검침 기간과 요금 옵션별로 미리 정리한 요금 조건"""
+
+    def __init__(self, start, end, lhv_clcd="1", dwel_clcd="1", welfare_code="", family_code=""):
+        self.start = _parse_ymd(start)
+        self.end = _parse_ymd(end)
+        self.lhv = str(lhv_clcd or "1")
+        self.residential = str(dwel_clcd or "1") == "1"
+        self.welfare_code = welfare_code or ""
+        self.family_code = family_code or ""
+        self.key = (self.start, self.end, self.lhv, str(dwel_clcd or "1"), self.welfare_code, self.family_code)
+
+        basic_table = BASIC_CHARGE.get(self.lhv, BASIC_CHARGE["1"])
+        rate_table = ENERGY_RATE.get(self.lhv, ENERGY_RATE["1"])
+        super_rate = SUPER_USER_RATE.get(self.lhv, SUPER_USER_RATE["1"])
+
+        segments = billing_segments(self.start, self.end)
+        total_days = sum(days for _, days in segments) or 1
+
+        # 월별 구간: (일할 비율, 누진 상한, 슈퍼유저 요금, 슈퍼유저 상한)
+        self._segments = []
+        boundaries = set()
+        self.summer_ratio = 0.0
+        for month, days in segments:
+            ratio = days / total_days
+            summer = month in SUMMER_MONTHS
+            if summer:
+                self.summer_ratio += ratio
+            if not self.residential:
+                # 비주거용은 누진 없이 최고 구간 요금 적용
+                self._segments.append((ratio, (), None, math.inf))
+                continue
+            limits = tuple(limit * ratio for limit in (TIER_LIMITS_SUMMER if summer else TIER_LIMITS_OTHER))
+            seasonal_super = super_rate if (summer or month in WINTER_MONTHS) else None
+            self._segments.append((ratio, limits, seasonal_super, SUPER_USER_LIMIT * ratio))
+            # 사용량을 일수 비율로 나누므로 월별 구간은 전체 사용량 기준 같은 상한에서 바뀜
+            boundaries.update(TIER_LIMITS_SUMMER if summer else TIER_LIMITS_OTHER)
+            if seasonal_super is not None:
+                boundaries.add(SUPER_USER_LIMIT)
+        self.tier_boundaries = tuple(sorted(boundaries))  # 누진 구간 상한 (kWh, 이 값까지 아래 구간)
+        self._basic_table = basic_table
+        self._rate_table = rate_table
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, TariffPeriod) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    @classmethod
+    def from_req_param(cls, req_param: dict) -> TariffPeriod:
+        house = (req_param.get("houseList") or [{}])[0]
+        return cls(
+            req_param["chrgStYmd"],
+            req_param["chrgEndYmd"],
+            req_param.get("lhvClcd"),
+            req_param.get("dwelClcd"),
+            house.get("wlfrDcClcd1", ""),
+            house.get("wlfrDcClcd2", ""),
+        )
+
+    def _discount_limit(self, limit_other, limit_summer) -> int:
+        return math.floor(limit_other * (1 - self.summer_ratio) + limit_summer * self.summer_ratio)
+
+    def components(self, usage: int) -> tuple:
+        """사용량별 요금 항목 (`RESULT_FIELDS` 순서 + 200kWh 이하 할인)"""
+        basic = 0.0
+        energy = 0.0
+        for ratio, limits, super_rate, super_limit in self._segments:
+            seg_usage = usage * ratio
+            if not limits:
+                basic += self._basic_table[-1] * ratio
+                energy += seg_usage * self._rate_table[-1]
+                continue
+            basic += self._basic_table[_tier_index(seg_usage, limits)] * ratio
+            energy += _tier_charges(seg_usage, limits, self._rate_table, super_rate, super_limit)
+
+        # 일할 계산의 부동소수점 오차 보정 후 원 미만 절사
+        basic = math.floor(basic + 1e-6)
+        energy = math.floor(energy + 1e-6)
+        climate = math.floor(usage * CLIMATE_RATE)
+        fuel = math.floor(usage * FUEL_RATE)
+
+        under_200 = 0
+        if self.residential and self.welfare_code and usage <= UNDER_200_LIMIT:
+            under_200 = max(0, min(UNDER_200_DEDUCTION.get(self.lhv, 0), basic + energy - MINIMUM_CHARGE))
+
+        subtotal = basic + energy + climate + fuel - under_200
+
+        discounts = dict.fromkeys(DISCOUNT_FIELDS, 0)
+        best_field, best_amount = None, 0
+        if self.residential and self.welfare_code in WELFARE_DISCOUNTS:
+            field, limit_other, limit_summer, rate = WELFARE_DISCOUNTS[self.welfare_code]
+            if rate is not None:
+                amount = math.floor(subtotal * rate)
+            else:
+                amount = self._discount_limit(limit_other, limit_summer)
+            best_field, best_amount = field, min(amount, subtotal)
+        if self.residential and self.family_code in FAMILY_DISCOUNTS:
+            field, limit_other, limit_summer = FAMILY_DISCOUNTS[self.family_code]
+            amount = math.floor(subtotal * FAMILY_DISCOUNT_RATE)
+            if limit_other is not None:
+                amount = min(amount, self._discount_limit(limit_other, limit_summer))
+            # 복지할인과 중복 시 큰 금액 하나만 적용
+            if amount > best_amount:
+                best_field, best_amount = field, amount
+        best_amount = max(0, best_amount)
+        if best_field:
+            discounts[best_field] = best_amount
+
+        elec = max(0, subtotal - best_amount)
+        vat, fund, total = charge_totals(elec)
+
+        return (basic, energy, fuel, climate, elec, vat, fund, *discounts.values(), total, under_200)
+
+    def bill(self, usage: int) -> dict:
+        """사용량별 요금을 `dma_resObj` 형태로 반환"""
+        return to_res_obj(self.components(usage))
+
+
+def charge_totals(elec: int) -> tuple[int, int, int]:
+    """전기요금(할인 반영, 세전)의 부가가치세, 전력산업기반기금, 청구금액"""
+    vat = math.floor(elec * VAT_RATE + 0.5)
+    fund = math.floor(elec * FUND_RATE / 10) * 10
+    total = math.floor((elec + vat + fund) / 10) * 10
+    return vat, fund, total
+
+
+def to_res_obj(components) -> dict:
+    """요금 항목 튜플을 한전 API 응답(`dma_resObj`) 형태로 변환"""
+    res_obj = dict(zip(RESULT_FIELDS, components))
+    res_obj["calcostList"] = [
+        {
+            "costUnder200": components[-1],
+            "housecalList": [{"disVlnCost": 0}],
+        }
+    ]
+    return res_obj
+
+
+@lru_cache(maxsize=64)
+def tariff_period(start: str, end: str, lhv_clcd: str, dwel_clcd: str, welfare_code: str, family_code: str) -> TariffPeriod:
+    """같은 기간/요금 옵션의 요금 조건은 한 번만 준비해 재사용"""
+    return TariffPeriod(start, end, lhv_clcd, dwel_clcd, welfare_code, family_code)
+
+
+def period_for(req_param: dict) -> TariffPeriod:
+    """`dma_reqParam` 의 검침 기간/요금 옵션에 해당하는 요금 조건 (재사용)"""
+    house = (req_param.get("houseList") or [{}])[0]
+    return tariff_period(
+        str(req_param["chrgStYmd"]),
+        str(req_param["chrgEndYmd"]),
+        str(req_param.get("lhvClcd") or "1"),
+        str(req_param.get("dwelClcd") or "1"),
+        house.get("wlfrDcClcd1", "") or "",
+        house.get("wlfrDcClcd2", "") or "",
+    )
+
+
+@lru_cache(maxsize=16)
+def bill_table(period: TariffPeriod, max_usage: int) -> BillTable:
+    """같은 기간/요금 옵션의 요금표는 모든 센서가 함께 사용"""
+    return BillTable(period, max_usage)
+
+
+def calculate_bill(req_param: dict) -> dict:
+    """`dma_reqParam` 으로 요금을 계산해 `dma_resObj` 형태로 반환"""
+    return period_for(req_param).bill(int(req_param.get("whmeMloadUski") or 0))
+
+
+class BillTable:
+    """한 검침 기간의 사용량(kWh)별 요금표
+
+    0 ~ max_usage kWh 전체를 한 번에 계산해 항목별 배열로 저장하고,
+    이후 조회는 인덱스 접근만 합니다.
+    """
+
+    def __init__(self, period: TariffPeriod, max_usage: int):
+        self.period = period
+        self.key = period.key
+        self.max_usage = max_usage
+        rows = [period.components(usage) for usage in range(max_usage + 1)]
+        self._columns = [array("q", column) for column in zip(*rows)]
+
+    def __len__(self) -> int:
+        return self.max_usage + 1
+
+    def __contains__(self, usage) -> bool:
+        return 0 <= usage <= self.max_usage
+
+    def total(self, usage: int) -> int | None:
+        """총 청구금액만 조회"""
+        if usage not in self:
+            return None
+        return self._columns[len(RESULT_FIELDS) - 1][usage]
+
+    def tier(self, usage: int) -> tuple[int, int | None, int | None]:
+        """사용량이 속한 누진 구간 (1부터 시작하는 번호, 이전 구간 상한, 현재 구간 상한)
+
+        구간 상한을 다 쓴 사용량은 다음 1kWh부터 다음 구간 요금이 붙으므로 다음 구간으로 봅니다.
+        """
+        boundaries = self.period.tier_boundaries
+        index = bisect_right(boundaries, usage)
+        lower = boundaries[index - 1] if index else None
+        upper = boundaries[index] if index < len(boundaries) else None
+        return index + 1, lower, upper
+
+    def marginal_price(self, usage: int) -> float | None:
+        """현재 누진 구간에서 1kWh 더 쓸 때의 요금 (원/kWh, 부가가치세/기금 포함)
+
+        남은 구간의 전기요금(할인 반영, 세금 전) 증가분 평균에 부가가치세와 기금 비율을 곱합니다.
+        """
+        if usage not in self:
+            return None
+        _, lower, upper = self.tier(usage)
+        first = lower + 1 if lower is not None else 0
+        last = min(upper if upper is not None else usage + MARGINAL_LAST_SPAN, self.max_usage)
+        first = max(first, min(usage, last - MARGINAL_MIN_SPAN))
+        if last <= first:
+            return None
+        elec = self._columns[RESULT_FIELDS.index("costElecUse")]
+        return round((elec[last] - elec[first]) / (last - first) * (1 + VAT_RATE + FUND_RATE), 1)
+
+    def lookup(self, usage: int) -> dict | None:
+        """사용량별 요금을 `dma_resObj` 형태로 조회 (범위 밖이면 None)"""
+        if usage not in self:
+            return None
+        return to_res_obj([column[usage] for column in self._columns])
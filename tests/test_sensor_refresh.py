@@ -0,0 +1,117 @@
+"""요금 센서 재계산 예약 검증
+
+계산 중(디바운서 잠금 상태)에 들어온 사용량 변경이 버려지지 않는지 확인합니다.
+Home Assistant가 설치된 개발 환경에서만 실행됩니다.
+"""
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "custom_components"))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers.debounce import Debouncer  # noqa: E402
+
+import kepco_electricity as integration  # noqa: E402
+from kepco_electricity import sensor as sensor_module  # noqa: E402
+from kepco_electricity.const import DOMAIN  # noqa: E402
+from kepco_electricity.sensor import KepcoElectricitySensor  # noqa: E402
+
+COOLDOWN = 0.1  # 초
+CALCULATION = 0.3  # 계산 지연 (초)
+USAGE_ENTITY = "sensor.usage"
+
+OPTIONS = {
+    "usage_entity": USAGE_ENTITY,
+    "sensor_name": "Test Bill",
+    "meter_reading_day": 25,
+    "meter_reading_day_offset": 0,
+    "lhv_clcd": "1",
+    "dwel_clcd": "1",
+    "wlfr_dc_clcd1": "",
+    "wlfr_dc_clcd2": "",
+    "calculation_mode": "local",
+    "api_check_interval": 0,
+}
+
+
+def _make_sensor(hass: HomeAssistant) -> KepcoElectricitySensor:
+    entry = SimpleNamespace(entry_id="test", options=dict(OPTIONS))
+    sensor = KepcoElectricitySensor(entry)
+    sensor.hass = hass
+    sensor.entity_id = "sensor.test_bill"
+    sensor.async_write_ha_state = lambda: None
+    sensor._async_start_calendar()
+    sensor._debouncer = Debouncer(
+        hass, sensor_module._LOGGER, cooldown=COOLDOWN, immediate=True, function=sensor._async_refresh
+    )
+
+    # 계산이 진행 중인 시간을 만들기 위해 계산 지연
+    calculate = sensor._async_calculate
+
+    async def _slow_calculate(*args, **kwargs):
+        await asyncio.sleep(CALCULATION)
+        return await calculate(*args, **kwargs)
+
+    sensor._async_calculate = _slow_calculate
+    return sensor
+
+
+def _run(tmp_path, monkeypatch, scenario):
+    monkeypatch.setattr(sensor_module, "USAGE_DEBOUNCE_SECONDS", COOLDOWN)
+
+    async def _async_main():
+        hass = HomeAssistant(str(tmp_path))
+        await integration.async_setup(hass, {DOMAIN: {}})
+        sensor = _make_sensor(hass)
+        try:
+            await scenario(hass, sensor)
+        finally:
+            sensor._calendar.async_stop()
+            sensor._async_cancel_follow_up()
+            await hass.async_stop(force=True)
+
+    asyncio.run(_async_main())
+
+
+def test_usage_change_during_calculation(tmp_path, monkeypatch):
+    async def _scenario(hass, sensor):
+        hass.states.async_set(USAGE_ENTITY, "10.2")
+        running = hass.async_create_task(sensor._debouncer.async_call())
+        await asyncio.sleep(CALCULATION / 3)
+
+        # 계산 중 사용량 변경 (디바운서는 이 호출을 버림)
+        hass.states.async_set(USAGE_ENTITY, "11.4")
+        sensor._async_usage_changed(SimpleNamespace(data={"new_state": hass.states.get(USAGE_ENTITY)}))
+        await running
+        assert sensor._last_integer_usage == 10
+
+        await asyncio.sleep(COOLDOWN * 2 + CALCULATION * 2)
+        assert sensor._last_integer_usage == 11
+
+    _run(tmp_path, monkeypatch, _scenario)
+
+
+def test_options_change_during_calculation(tmp_path, monkeypatch):
+    async def _scenario(hass, sensor):
+        hass.states.async_set(USAGE_ENTITY, "350.0")
+        running = hass.async_create_task(sensor._debouncer.async_call())
+        await asyncio.sleep(CALCULATION / 3)
+
+        # 계산 중 계약종별 변경 (진행 중인 계산은 이전 옵션 사용)
+        options = {**OPTIONS, "lhv_clcd": "2"}
+        sensor._config_entry.options = options
+        assert sensor.async_apply_options(options)
+        await running
+        assert sensor._last_integer_usage is None
+
+        await asyncio.sleep(COOLDOWN * 2 + CALCULATION * 2)
+        assert sensor._last_integer_usage == 350
+        assert sensor.extra_state_attributes["계약종별 선택"] == "주택용(고압)"
+
+    _run(tmp_path, monkeypatch, _scenario)
@@ -0,0 +1,86 @@
+"""로컬 요금 엔진 검증
+
+기대값은 한전 주택용 요금표(tariff.py 상수)로 손으로 계산한 값입니다.
+기본 요금 → 전력량 요금(누진, 월별 일할) → 기후환경/연료비 → 할인 → 부가가치세(반올림)
+→ 전력산업기반기금(10원 미만 절사) → 청구금액(10원 미만 절사) 순서입니다.
+"""
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+# 패키지 __init__ (Home Assistant 의존) 없이 tariff.py 만 불러옴
+_SPEC = importlib.util.spec_from_file_location(
+    "kepco_tariff",
+    Path(__file__).resolve().parents[1] / "custom_components" / "kepco_electricity" / "tariff.py",
+)
+tariff = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(tariff)
+
+
+def req_param(start, end, usage, lhv="1", dwel="1", welfare="", family=""):
+    return {
+        "chrgStYmd": start,
+        "chrgEndYmd": end,
+        "lhvClcd": lhv,
+        "dwelClcd": dwel,
+        "whmeMloadUski": str(usage),
+        "houseList": [{"wlfrDcClcd1": welfare, "wlfrDcClcd2": family}],
+    }
+
+
+CASES = [
+    # 기타계절 저압 350kWh: 1600 + 200×120 + 150×214.6 + 350×9 + 350×5 = 62690
+    # 부가세 6269, 기금 2000 → 70959 → 70950
+    pytest.param(req_param("20250401", "20250430", 350), 70950, id="other-low-350"),
+    # 하계 저압 400kWh (300/450 구간): 1600 + 300×120 + 100×214.6 + 3600 + 2000 = 64660
+    # 부가세 6466, 기금 2060 → 73186 → 73180
+    pytest.param(req_param("20250701", "20250731", 400), 73180, id="summer-low-400"),
+    # 6/25~7/24 (6월 6일, 7월 24일) 400kWh 일할: 6월 80kWh(40/80), 7월 320kWh(240/360)
+    # 전력량 13384 + 45968, 합계 66552, 부가세 6655, 기금 2120 → 75327 → 75320
+    pytest.param(req_param("20250625", "20250724", 400), 75320, id="summer-prorated-400"),
+    # 고압 300kWh: 1260 + 200×105 + 100×174 + 2700 + 1500 = 43860
+    # 부가세 4386, 기금 1400 → 49646 → 49640
+    pytest.param(req_param("20250401", "20250430", 300, lhv="2"), 49640, id="other-high-300"),
+    # 3자녀 이상(22) 350kWh: 62690 의 30% = 18807 → 한도 16000, 46690
+    # 부가세 4669, 기금 1490 → 52849 → 52840
+    pytest.param(req_param("20250401", "20250430", 350, family="22"), 52840, id="family-discount"),
+    # 장애인(01) 150kWh: 910 + 18000 + 1350 + 750 - 필수사용량 공제 4000 = 17010
+    # 할인 16000 → 1010, 부가세 101, 기금 30 → 1141 → 1140
+    pytest.param(req_param("20250401", "20250430", 150, welfare="01"), 1140, id="welfare-discount"),
+]
+
+
+@pytest.mark.parametrize(("param", "expected"), CASES)
+def test_total_charge(param, expected):
+    assert tariff.calculate_bill(param)["costTotCharge"] == expected
+
+
+@pytest.mark.parametrize(("param", "expected"), CASES)
+def test_bill_table_matches_engine(param, expected):
+    period = tariff.TariffPeriod.from_req_param(param)
+    table = tariff.BillTable(period, 500)
+    assert table.total(int(param["whmeMloadUski"])) == expected
+
+
+@pytest.mark.parametrize(
+    ("usage", "expected"),
+    [(0, (1, None, 200)), (199, (1, None, 200)), (200, (2, 200, 400)), (201, (2, 200, 400)), (400, (3, 400, None))],
+)
+def test_tier_boundaries(usage, expected):
+    period = tariff.TariffPeriod.from_req_param(req_param("20250401", "20250430", usage))
+    assert tariff.BillTable(period, 500).tier(usage) == expected
+
+
+def test_marginal_price_at_boundary():
+    # 200kWh 를 다 쓴 뒤 1kWh 는 2구간 요금 (214.6 + 9 + 5) × 1.132
+    period = tariff.TariffPeriod.from_req_param(req_param("20250401", "20250430", 200))
+    assert tariff.BillTable(period, 500).marginal_price(200) == pytest.approx(258.8, abs=0.5)
+
+
+@pytest.mark.parametrize(("param", "expected"), CASES)
+def test_charge_totals_match_engine(param, expected):
+    res_obj = tariff.calculate_bill(param)
+    assert tariff.charge_totals(res_obj["costElecUse"]) == (
+        res_obj["costAddTax"], res_obj["costElecFund"], expected
+    )